@@ -5,10 +5,16 @@ import subprocess
 import dspy
 import mlflow
 from crec.config import config
-from crec.agent import Agent
+from crec.agent import Agent, default_memory_config
+from crec.conversation_memory import MemoryTools
+from crec.embedding_cache import cache_mem0_embedder
+from crec.memory_writer import MemoryWriter
+from crec.response_cache import ResponseCache
 from flask import Flask
+from mem0 import Memory
 
 from .app import bp as app_bp
+from .sessions import SessionManager
 
 
 def start_mlflow_server():
@@ -67,11 +73,35 @@ def create_app():
     )
     dspy.configure(lm=lm)
 
-    agent = Agent(
-        max_iterations=5,
-        streaming=True,
+    # One mem0 backend and background writer for every session; each
+    # session reads and writes its own mem0 user.
+    memory = cache_mem0_embedder(Memory.from_config(default_memory_config()))
+    app.memory_writer = MemoryWriter(memory)
+
+    response_cache = None
+    if config.response_cache:
+        response_cache = ResponseCache(
+            threshold=config.response_cache_threshold,
+            ttl=config.response_cache_ttl,
+            max_entries=config.response_cache_size,
+        )
+    app.response_cache = response_cache
+
+    def make_agent(session_id: str) -> Agent:
+        return Agent(
+            max_iterations=5,
+            streaming=True,
+            memory_tools=MemoryTools(
+                memory=memory, user_id=session_id, writer=app.memory_writer
+            ),
+            response_cache=response_cache,
+        )
+
+    app.sessions = SessionManager(
+        make_agent,
+        max_sessions=config.max_sessions,
+        idle_ttl=config.session_idle_ttl,
     )
-    app.agent = agent
 
     app.register_blueprint(app_bp)
 
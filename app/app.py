@@ -7,6 +7,8 @@ from flask import (
 )
 from flask import current_app as app
 
+from .sessions import SESSION_COOKIE, new_session_id, session_id_from
+
 bp = Blueprint("app", __file__)
 
 
@@ -19,9 +21,16 @@ def index():
 def chat():
     data = request.json
     user_query = data.get("message")
+    session_id = session_id_from(request.cookies) or new_session_id()
 
     def generate():
-        responses_gen = app.agent(user_query=user_query)
-        yield from responses_gen  # Send piece by piece to client
+        # Turns within one conversation run one at a time.
+        with app.sessions.locked(session_id) as session:
+            responses_gen = session.agent(
+                user_query=user_query, bypass_cache=bool(data.get("bypass_cache"))
+            )
+            yield from responses_gen  # Send piece by piece to client
 
-    return Response(stream_with_context(generate()), mimetype="text/plain")
+    response = Response(stream_with_context(generate()), mimetype="text/plain")
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="Lax")
+    return response
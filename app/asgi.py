@@ -0,0 +1,114 @@
+"""ASGI entry point with an async, streaming `/chat` endpoint.
+
+`POST /chat` is served natively on the event loop through `Agent.aforward`,
+so a slow LLM call no longer pins a worker thread for the whole turn. Every
+other route is delegated to the Flask app.
+
+Run with:
+    uvicorn --factory app.asgi:create_asgi_app
+"""
+
+import json
+from http.cookies import SimpleCookie
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import Flask
+
+from . import create_app
+from .sessions import SESSION_COOKIE, new_session_id, session_id_from
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+def _cookies(scope) -> dict:
+    cookie = SimpleCookie()
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            cookie.load(value.decode("latin-1"))
+    return {key: morsel.value for key, morsel in cookie.items()}
+
+
+async def _send_text(send, status: int, text: str):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+        }
+    )
+    await send({"type": "http.response.body", "body": text.encode()})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def create_asgi_app(flask_app: Flask = None):
+    """Wrap `flask_app` (built with `create_app` if omitted) as an ASGI app."""
+    if flask_app is None:
+        flask_app = create_app()
+
+    wsgi_app = WsgiToAsgi(flask_app)
+
+    async def chat(scope, receive, send):
+        try:
+            data = json.loads(await _read_body(receive))
+            user_query = data["message"]
+        except (ValueError, KeyError, TypeError):
+            await _send_text(send, 400, "Expected a JSON body with a `message`.")
+            return
+
+        session_id = session_id_from(_cookies(scope)) or new_session_id()
+        set_cookie = f"{SESSION_COOKIE}={session_id}; Path=/; HttpOnly; SameSite=Lax"
+
+        # Turns within one conversation run one at a time.
+        async with flask_app.sessions.alocked(session_id) as session:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"text/plain; charset=utf-8"),
+                        (b"set-cookie", set_cookie.encode()),
+                    ],
+                }
+            )
+            async for chunk in session.agent.aforward(
+                user_query=user_query, bypass_cache=bool(data.get("bypass_cache"))
+            ):
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk.encode(),
+                        "more_body": True,
+                    }
+                )
+            await send({"type": "http.response.body", "body": b""})
+
+    async def application(scope, receive, send):
+        if scope["type"] == "lifespan":
+            await _lifespan(receive, send)
+        elif (
+            scope["type"] == "http"
+            and scope["path"] == "/chat"
+            and scope["method"] == "POST"
+        ):
+            await chat(scope, receive, send)
+        else:
+            await wsgi_app(scope, receive, send)
+
+    return application
@@ -0,0 +1,183 @@
+"""Per-conversation agent state for the web app.
+
+Each browser conversation gets its own `Agent` (history, `prev_response`,
+mem0 `user_id`), looked up by a session id carried in a cookie. The LM, the
+retrievers and the mem0 backend are shared by all sessions; only the light
+per-conversation state is built per session.
+
+The session id doubles as the mem0 user, so only ids this server issued are
+accepted: each carries an HMAC of its random part under
+`config.session_secret`. Without a configured secret, one is drawn per
+process and cookies stop verifying after a restart.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Iterator, Optional
+
+from crec.agent import Agent
+from crec.config import config
+
+SESSION_COOKIE = "crec_session"
+_PROCESS_SECRET = secrets.token_bytes(32)
+
+
+def _sign(token: str) -> str:
+    secret = config.session_secret
+    key = secret.encode() if secret else _PROCESS_SECRET
+    return hmac.new(key, token.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def new_session_id() -> str:
+    token = secrets.token_urlsafe(16)
+    return f"{token}.{_sign(token)}"
+
+
+def session_id_from(cookies: dict) -> Optional[str]:
+    """Return the session id in the cookie if this server issued it."""
+    session_id = cookies.get(SESSION_COOKIE)
+    if not isinstance(session_id, str) or len(session_id) > 128:
+        return None
+    token, _, signature = session_id.partition(".")
+    if token and hmac.compare_digest(signature, _sign(token)):
+        return session_id
+    return None
+
+
+class Session:
+    """One conversation's agent plus the lock that serializes its turns."""
+
+    def __init__(self, session_id: str, agent: Agent):
+        self.session_id = session_id
+        self.agent = agent
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    async def aacquire(self):
+        """Acquire `lock` from a coroutine without blocking the event loop.
+
+        An uncontended lock is taken directly; otherwise a worker thread
+        waits for it. If the coroutine is cancelled meanwhile, the lock is
+        released as soon as that thread gets it.
+        """
+        if self.lock.acquire(blocking=False):
+            return
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.lock.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            acquiring.add_done_callback(lambda _: self.lock.release())
+            raise
+
+
+class SessionManager:
+    """LRU + idle-TTL cache of `Session`s keyed by session id.
+
+    Sessions idle for longer than `idle_ttl` seconds are dropped, and once
+    more than `max_sessions` are live the least recently used ones go first.
+    A session whose lock is held is mid-turn and is never evicted.
+
+    Args:
+        agent_factory: Builds the `Agent` for a new session id.
+        max_sessions: Soft cap on sessions kept in memory.
+        idle_ttl: Seconds of inactivity after which a session is dropped.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[str], Agent],
+        max_sessions: int = 256,
+        idle_ttl: float = 3600,
+    ):
+        self.agent_factory = agent_factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> Session:
+        """Return the session for `session_id`, creating it if needed.
+
+        The agent is built outside the manager lock, so a slow factory does
+        not hold up other conversations. If two requests build one for the
+        same id, the first inserted wins.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                return self._touch(session)
+        created = Session(session_id, self.agent_factory(session_id))
+        with self._lock:
+            session = self._sessions.setdefault(session_id, created)
+            return self._touch(session)
+
+    def _touch(self, session: Session) -> Session:
+        self._sessions.move_to_end(session.session_id)
+        session.last_used = time.monotonic()
+        self._evict()
+        return session
+
+    def _live(self, session: Session) -> bool:
+        with self._lock:
+            return self._sessions.get(session.session_id) is session
+
+    @contextmanager
+    def locked(self, session_id: str) -> Iterator[Session]:
+        """Hold the lock of `session_id`'s session for one turn.
+
+        A session can be evicted between `get` and taking its lock, so the
+        lookup is repeated until the locked session is still the live one.
+        """
+        while True:
+            session = self.get(session_id)
+            session.lock.acquire()
+            if self._live(session):
+                break
+            session.lock.release()
+        try:
+            yield session
+        finally:
+            session.lock.release()
+
+    @asynccontextmanager
+    async def alocked(self, session_id: str):
+        """`locked` for coroutines, without blocking the event loop."""
+        while True:
+            session = self.get(session_id)
+            await session.aacquire()
+            if self._live(session):
+                break
+            session.lock.release()
+        try:
+            yield session
+        finally:
+            session.lock.release()
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict(self):
+        # Oldest first; the session just touched sits at the end.
+        now = time.monotonic()
+        overflow = len(self._sessions) - self.max_sessions
+        for session_id, session in list(self._sessions.items())[:-1]:
+            if session.lock.locked():
+                continue
+            if now - session.last_used > self.idle_ttl:
+                del self._sessions[session_id]
+                overflow -= 1
+            elif overflow > 0:
+                del self._sessions[session_id]
+                overflow -= 1
+            else:
+                break
@@ -0,0 +1,172 @@
+"""Shared stand-ins for the external services the benchmarks would otherwise hit.
+
+Nothing here talks to Ollama, so the numbers isolate the cost of our own code
+paths (handle reuse, batching, caching) from model latency.
+"""
+
+import hashlib
+import random
+import re
+import time
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+SUBJECTS = ["COMPSCI", "MATH", "STATS", "BIOL", "CHEM", "PHYS", "ECON", "HIST"]
+WORDS = (
+    "introduction advanced theory applied methods analysis systems data "
+    "learning programming algorithms structures probability statistics "
+    "linear algebra calculus physics chemistry biology economics history "
+    "research seminar design computation modeling networks policy"
+).split()
+
+
+class HashEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic bag-of-words embedder with an optional simulated latency.
+
+    Args:
+        dim: Embedding dimension.
+        request_latency: Seconds slept once per call, mimicking a round-trip.
+        item_latency: Seconds slept per input text, mimicking model compute.
+    """
+
+    def __init__(
+        self, dim: int = 64, request_latency: float = 0.0, item_latency: float = 0.0
+    ):
+        self.dim = dim
+        self.request_latency = request_latency
+        self.item_latency = item_latency
+        self.calls = 0
+
+    def __call__(self, input: Documents) -> Embeddings:
+        self.calls += 1
+        time.sleep(self.request_latency + self.item_latency * len(input))
+        return [self._embed(text) for text in input]
+
+    def _embed(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(token.encode()).digest()
+            vec[int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    @staticmethod
+    def name() -> str:
+        return "crec_bench_hash"
+
+    def get_config(self) -> dict:
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "HashEmbeddingFunction":
+        return HashEmbeddingFunction(dim=config["dim"])
+
+
+class StubMemoryTools:
+    """In-memory stand-in for ``crec.conversation_memory.MemoryTools``."""
+
+    def search_memories(self, query: str, limit: int = 5) -> str:
+        """Search for long-term memories"""
+        return "No relevant memories found."
+
+    def get_all_memories(self) -> str:
+        """Get all memories for a user."""
+        return "No memories found for this user."
+
+    def store_memory(self, content, user_id: str = "default_user", infer=False):
+        return f"Stored memory: {content}"
+
+
+def synthetic_courses(n: int, seed: int = 0) -> list[dict]:
+    """Return ``n`` course records shaped like ``parse_course_descriptions`` output."""
+    rng = random.Random(seed)
+    courses = []
+    for i in range(n):
+        subject = SUBJECTS[i % len(SUBJECTS)]
+        number = 100 + (i // len(SUBJECTS)) % 400
+        name = " ".join(rng.choices(WORDS, k=3)).title()
+        courses.append(
+            {
+                "course_code": f"{subject} {number}",
+                "course_name": name,
+                "credits": str(rng.choice([2, 4])),
+                "description": " ".join(rng.choices(WORDS, k=40)),
+                "prerequisites": (
+                    f"Prerequisite(s): {SUBJECTS[(i + 1) % len(SUBJECTS)]} 101"
+                    if i % 3 == 0
+                    else None
+                ),
+            }
+        )
+    return courses
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def bulletin_lines(courses: list[dict]) -> list[str]:
+    """Lay ``courses`` out the way the bulletin PDF prints them."""
+    lines = []
+    for c in courses:
+        lines.append(f"{c['course_code']} {c['course_name']} ({c['credits']} credits)")
+        words = c["description"].split()
+        lines += [" ".join(words[i : i + 12]) for i in range(0, len(words), 12)]
+        if c["prerequisites"]:
+            lines.append(c["prerequisites"])
+    return lines
+
+
+def write_bulletin_pdf(path: str, courses: list[dict], lines_per_page: int = 50):
+    """Write a plain text PDF of ``courses``, with records running across pages."""
+    lines = bulletin_lines(courses)
+    pages = [
+        lines[i : i + lines_per_page] for i in range(0, len(lines), lines_per_page)
+    ]
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page ids are known
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in pages:
+        body = (
+            "BT /F1 9 Tf 11 TL 40 800 Td "
+            + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page)
+            + " ET"
+        )
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    with open(path, "wb") as f:
+        f.write(out)
+    return len(pages)
+
+
+def report(label: str, timings: list[float]) -> None:
+    """Print mean / p50 / p95 latency in milliseconds for ``timings`` (seconds)."""
+    ms = np.array(timings) * 1000
+    print(
+        f"{label:<32} n={len(ms):<6} mean={ms.mean():8.3f}ms "
+        f"p50={np.percentile(ms, 50):8.3f}ms p95={np.percentile(ms, 95):8.3f}ms"
+    )
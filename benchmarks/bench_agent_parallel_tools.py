@@ -0,0 +1,115 @@
+"""End-to-end Agent latency for multi-tool turns, serial vs parallel tool calls.
+
+Usage:
+    python benchmarks/bench_agent_parallel_tools.py [--turns 5] [--tool-latency 0.3]
+
+A scripted LM drives a turn that needs ``major_retriever``,
+``course_retriever`` and ``schedule_retriever``. With ``dspy.ReAct`` that is
+one LM step per tool; with ``Agent(parallel_tools=True)`` the three calls go
+out in one step and run concurrently. Tools and the LM sleep to stand in for
+backend and model latency.
+"""
+
+import argparse
+import functools
+import time
+import warnings
+
+import dspy
+from _stubs import StubMemoryTools, report
+from dspy.utils import DummyLM
+
+import crec.agent
+from crec.agent import Agent
+
+
+class SlowDummyLM(DummyLM):
+    """DummyLM that sleeps ``latency`` seconds per request."""
+
+    def __init__(self, answers, latency: float):
+        super().__init__(answers)
+        self.latency = latency
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        time.sleep(self.latency)
+        return super().forward(prompt=prompt, messages=messages, **kwargs)
+
+
+def slow_tool(fn, latency: float):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        time.sleep(latency)
+        return f"{fn.__name__} result"
+
+    return wrapper
+
+
+TOOL_CALLS = [
+    {"name": "major_retriever", "args": {"major_queries": ["Computer Science"]}},
+    {"name": "course_retriever", "args": {"course_queries": ["COMPSCI 201"]}},
+    {"name": "schedule_retriever", "args": {"subject_code": "COMPSCI"}},
+]
+TAIL = [
+    {"reasoning": "Collected everything.", "response": "Agent summary."},
+    {"reasoning": "Write the plan.", "response": "Here is your schedule."},
+]
+
+
+def serial_script() -> list[dict]:
+    steps = [
+        {
+            "next_thought": f"Call {call['name']}.",
+            "next_tool_name": call["name"],
+            "next_tool_args": call["args"],
+        }
+        for call in TOOL_CALLS
+    ]
+    steps.append(
+        {"next_thought": "Done.", "next_tool_name": "finish", "next_tool_args": {}}
+    )
+    return steps + TAIL
+
+
+def parallel_script() -> list[dict]:
+    return [
+        {"next_thought": "These are independent.", "next_tool_calls": TOOL_CALLS},
+        {
+            "next_thought": "Done.",
+            "next_tool_calls": [{"name": "finish", "args": {}}],
+        },
+    ] + TAIL
+
+
+def run_turns(parallel: bool, turns: int, lm_latency: float) -> list[float]:
+    agent = Agent(parallel_tools=parallel, memory_tools=StubMemoryTools())
+    timings = []
+    for _ in range(turns):
+        agent.reset()
+        script = parallel_script() if parallel else serial_script()
+        with dspy.context(lm=SlowDummyLM(script, lm_latency)):
+            start = time.perf_counter()
+            for _ in agent(user_query="Plan my CS courses for next semester"):
+                pass
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--tool-latency", type=float, default=0.3)
+    parser.add_argument("--lm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+    for name in ("course_retriever", "major_retriever", "schedule_retriever"):
+        setattr(
+            crec.agent, name, slow_tool(getattr(crec.agent, name), args.tool_latency)
+        )
+
+    report("serial (dspy.ReAct)", run_turns(False, args.turns, args.lm_latency))
+    report("parallel_tools=True", run_turns(True, args.turns, args.lm_latency))
+
+
+if __name__ == "__main__":
+    main()
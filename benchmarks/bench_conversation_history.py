@@ -0,0 +1,108 @@
+"""History rendering cost as conversations grow.
+
+Usage:
+    python benchmarks/bench_conversation_history.py [--calls 200]
+
+Compares the previous ``ConversationMemory`` (pydantic entries re-dumped with
+``indent=4`` on every ``history_str``) with lines rendered once on ``save``,
+for 10, 100 and 1000 turns. Summarization is off so only rendering is
+measured. "save + read" times a turn as the agent runs it: two saves, then
+the full history string.
+"""
+
+import argparse
+import time
+
+from _stubs import WORDS, report
+from pydantic import BaseModel, ConfigDict
+
+from crec.conversation_memory import ConversationMemory
+
+
+class OldEntry(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    role: str
+    content: str
+
+
+class OldConversationMemory:
+    def __init__(self):
+        self.history: list[OldEntry] = []
+
+    def history_str(self, left: int = 0, right=None):
+        if right is None:
+            right = len(self.history)
+        return "\n".join(
+            [
+                i.model_dump_json(indent=4)
+                for i in self.history[left:right]
+                if not isinstance(i, dict)
+            ]
+        )
+
+    def save(self, role: str, content: str):
+        self.history.append(OldEntry(role=role, content=content))
+
+
+def fill(memory, turns: int):
+    for i in range(turns):
+        memory.save("user", " ".join(WORDS[i % 7 :]) + f" turn {i}")
+        memory.save("assistant", " ".join(WORDS) * 3)
+
+
+def time_calls(memory, calls: int, **kwargs) -> list[float]:
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        memory.history_str(**kwargs)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def time_turns(memory, calls: int) -> list[float]:
+    timings = []
+    for i in range(calls):
+        start = time.perf_counter()
+        memory.save("user", f"question {i}")
+        memory.save("assistant", " ".join(WORDS))
+        memory.history_str()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    for turns in (10, 100, 1000):
+        old, new = OldConversationMemory(), ConversationMemory()
+        fill(old, turns)
+        fill(new, turns)
+        report(f"old history_str {turns} turns", time_calls(old, args.calls))
+        report(f"new history_str {turns} turns", time_calls(new, args.calls))
+        last_ten = {"left": 2 * turns - 10}
+        report(
+            f"old last 10 msgs {turns} turns", time_calls(old, args.calls, **last_ten)
+        )
+        report(
+            f"new last 10 msgs {turns} turns", time_calls(new, args.calls, **last_ten)
+        )
+
+        report(f"old save + read {turns} turns", time_turns(old, args.calls))
+        report(f"new save + read {turns} turns", time_turns(new, args.calls))
+
+        start = time.perf_counter()
+        fill(OldConversationMemory(), turns)
+        old_save = (time.perf_counter() - start) / (2 * turns)
+        start = time.perf_counter()
+        fill(ConversationMemory(), turns)
+        new_save = (time.perf_counter() - start) / (2 * turns)
+        print(
+            f"{'save per message':<32} old={old_save * 1e6:8.2f}us "
+            f"new={new_save * 1e6:8.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
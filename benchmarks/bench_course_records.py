@@ -0,0 +1,94 @@
+"""Course record extraction from bulletin text, without PDF decoding.
+
+Usage:
+    python benchmarks/bench_course_records.py [--courses 20000] [--repeat 5]
+
+Compares the previous per-record extraction (patterns compiled on the fly, a
+prerequisite search plus a second split for the description) with
+``iter_course_records``'s precompiled single pass over each body, and times
+``parse_prerequisites`` on the extracted records. Outputs are checked to be
+identical.
+"""
+
+import argparse
+import re
+import time
+
+from _stubs import bulletin_lines, synthetic_courses
+
+from crec.ingestion.courses import iter_course_records
+from crec.ingestion.prerequisites import parse_prerequisites
+
+
+def old_course_records(text: str) -> list[dict]:
+    pattern = (
+        r"([A-Z]+\s+\d{3})\s+([^\(]+)\((\d+)\s+credits?\)(.*?)(?=\n[A-Z]+\s+\d{3}\s+|$)"
+    )
+    courses = []
+    for match in re.finditer(pattern, text, re.DOTALL):
+        full_text = match.group(4).strip()
+        prereq_pattern = (
+            r"((?:Prerequisite\(s\)|Pre/Co-requisite\(s\)):\s*.+?)(?=\n\n|\Z)"
+        )
+        prereq_match = re.search(prereq_pattern, full_text, re.DOTALL)
+        prerequisites = prereq_match.group(1).strip() if prereq_match else None
+        if prerequisites:
+            description = re.split(
+                r"(?:Prerequisite\(s\)|Pre/Co-requisite\(s\)):", full_text
+            )[0].strip()
+        else:
+            description = full_text.strip()
+        courses.append(
+            {
+                "course_code": match.group(1).strip(),
+                "course_name": match.group(2).strip(),
+                "credits": match.group(3).strip(),
+                "description": description,
+                "prerequisites": prerequisites,
+            }
+        )
+    return courses
+
+
+def best_of(repeat: int, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    courses = synthetic_courses(args.courses)
+    for i, course in enumerate(courses):
+        if i % 5 == 1:
+            course["prerequisites"] = (
+                "Prerequisite(s): COMPSCI 201 and MATH 105 or 201; STATS 210"
+            )
+    text = "\n".join(bulletin_lines(courses)) + "\n"
+
+    old_s, old = best_of(args.repeat, lambda: old_course_records(text))
+    new_s, new = best_of(args.repeat, lambda: list(iter_course_records([text])))
+    assert old == new, "extractors disagree"
+    parse_s, _ = best_of(
+        args.repeat, lambda: [parse_prerequisites(c["prerequisites"]) for c in new]
+    )
+
+    n = len(new)
+    print(f"{n} course records, best of {args.repeat}")
+    for label, seconds in [
+        ("before (per-record re.search/split)", old_s),
+        ("precompiled single pass", new_s),
+        ("parse_prerequisites", parse_s),
+    ]:
+        print(f"{label:<40} {seconds * 1000:8.1f}ms {n / seconds:10.0f} courses/s")
+
+
+if __name__ == "__main__":
+    main()
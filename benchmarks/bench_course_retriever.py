@@ -0,0 +1,87 @@
+"""Per-call latency of course_retriever with and without the shared Chroma handle.
+
+Usage:
+    python benchmarks/bench_course_retriever.py [--courses 2000] [--calls 500]
+
+"before" reproduces the old behaviour of opening a client and collection on
+every call; "after" goes through ``crec.tools.course_ret.course_retriever``,
+which reuses the process-wide handle.
+"""
+
+import argparse
+import hashlib
+import random
+import tempfile
+import time
+
+import chromadb
+from chromadb.config import Settings
+from _stubs import HashEmbeddingFunction, report, synthetic_courses
+
+from crec.config import config
+from crec.tools import chroma_handles
+from crec.tools.course_ret import course_retriever
+
+
+def populate(path: str, n: int) -> list[dict]:
+    courses = synthetic_courses(n)
+    collection = chroma_handles.get_client(path).get_or_create_collection(
+        name=config.courses_col, embedding_function=HashEmbeddingFunction()
+    )
+    for start in range(0, n, 256):
+        batch = courses[start : start + 256]
+        docs = [str(c) for c in batch]
+        collection.add(
+            ids=[hashlib.md5(d.encode()).hexdigest() for d in docs],
+            documents=docs,
+            metadatas=[
+                {"course_code": c["course_code"], "course_name": c["course_name"]}
+                for c in batch
+            ],
+        )
+    return courses
+
+
+def old_style_call(path: str, query: str) -> None:
+    client = chromadb.PersistentClient(
+        path=path, settings=Settings(anonymized_telemetry=False)
+    )
+    collection = client.get_or_create_collection(
+        name=config.courses_col, embedding_function=HashEmbeddingFunction()
+    )
+    collection.query(query_texts=[query], n_results=3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.chroma_path = tmp
+        courses = populate(tmp, args.courses)
+        rng = random.Random(1)
+        queries = [rng.choice(courses)["course_name"] for _ in range(args.calls)]
+
+        before = []
+        for query in queries:
+            start = time.perf_counter()
+            old_style_call(tmp, query)
+            before.append(time.perf_counter() - start)
+
+        # Open the shared handle with the stub embedder so no Ollama is needed.
+        chroma_handles.invalidate()
+        chroma_handles.get_collection(embedding_function=HashEmbeddingFunction())
+        after = []
+        for query in queries:
+            start = time.perf_counter()
+            course_retriever([query])
+            after.append(time.perf_counter() - start)
+
+    report("before (open per call)", before)
+    report("after (shared handle)", after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Query embedding cost with and without the shared embedding cache.
+
+Usage:
+    python benchmarks/bench_embedding_cache.py [--queries 500] [--distinct 60]
+
+Replays a skewed mix of repeated queries (a few topics are asked about a
+lot) through a stub embedder that sleeps like an Ollama round-trip, once
+directly and once through ``EmbeddingCache``.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from _stubs import WORDS, HashEmbeddingFunction, report
+
+from crec.embedding_cache import EmbeddingCache
+
+
+def query_mix(n: int, distinct: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    topics = [" ".join(rng.choices(WORDS, k=4)) for _ in range(distinct)]
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    queries = rng.choices(topics, weights=weights, k=n)
+    # Same topic, different spacing: should still hit.
+    return [q.replace(" ", "  ") if i % 5 == 0 else q for i, q in enumerate(queries)]
+
+
+def run(embed, queries: list[str]) -> list[float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        embed([query])
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    queries = query_mix(args.queries, args.distinct)
+    embedder = HashEmbeddingFunction(request_latency=args.latency)
+    report("uncached", run(embedder, queries))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embedding_cache.sqlite")
+        cache = EmbeddingCache("bench", path=path)
+        report("cached (cold)", run(lambda t: cache.embed(t, embedder), queries))
+        print(cache.stats())
+
+        restarted = EmbeddingCache("bench", path=path)
+        report(
+            "cached (after restart)",
+            run(lambda t: restarted.embed(t, embedder), queries),
+        )
+        print(restarted.stats())
+
+
+if __name__ == "__main__":
+    main()
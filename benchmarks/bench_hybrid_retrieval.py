@@ -0,0 +1,163 @@
+"""Text queries in course_retriever: vector only vs BM25 + vector fusion.
+
+Usage:
+    python benchmarks/bench_hybrid_retrieval.py [--courses 2000] [--queries 300]
+
+Synthetic courses are named and described with the vocabulary of their
+field plus common catalog words ("Applied Linear Algebra", "... matrices
+vectors methods ..."), so query terms occur in many courses of a field, as
+they do in the real catalog. The labelled queries are of two kinds, each
+relevant to the course they were drawn from and any course of the same name:
+- title queries are a course's name,
+- natural queries wrap two of its name words and one description word in a
+  question, e.g. "which courses cover algebra, linear and proofs".
+
+Each query is answered three ways:
+- vector search only, as before,
+- BM25 fused with the vector search by reciprocal rank fusion,
+- the same fusion with the lexical fast path, which skips embedding for
+  queries that are exactly a course name.
+
+The report gives latency and recall@3 per kind, and how often the fast path
+answered without embedding. The stub embedder sleeps per request to stand in
+for Ollama.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from _stubs import HashEmbeddingFunction, report
+
+from crec.config import config
+from crec.ingestion.courses import add_nodes, course_to_node
+from crec.tools import chroma_handles
+from crec.tools.catalog_index import CatalogIndex
+from crec.tools.course_ret import course_retriever
+from crec.tools.lexical_index import BM25Index
+from crec.tools.memo import clear_memos
+
+FIELDS = {
+    "COMPSCI": "programming algorithms data structures software systems "
+    "networks compilers databases security machine learning",
+    "MATH": "linear algebra calculus proofs matrices vectors topology "
+    "analysis probability equations geometry number theory",
+    "BIOL": "cells genetics evolution ecology molecular organisms proteins "
+    "physiology genomes neurons development microbiology",
+    "CHEM": "organic reactions molecules bonding synthesis spectroscopy "
+    "thermodynamics kinetics inorganic analytical laboratory polymers",
+    "ECON": "markets prices labor trade growth monetary policy firms "
+    "incentives econometrics development finance",
+    "HIST": "empire revolution modern china europe war colonial archives "
+    "cultural global medieval societies",
+}
+COMMON = "introduction advanced topics methods seminar research applied theory".split()
+QUESTIONS = (
+    "which courses cover {}",
+    "i want to learn about {}",
+    "classes on {}",
+    "is there a course about {}",
+)
+
+
+def field_courses(n: int, rng: random.Random) -> list[dict]:
+    """``n`` courses named and described from their field's vocabulary."""
+    courses = []
+    subjects = list(FIELDS)
+    for i in range(n):
+        subject = subjects[i % len(subjects)]
+        words = FIELDS[subject].split()
+        name = rng.sample(words, 2)
+        if rng.random() < 0.5:
+            name.insert(0, rng.choice(COMMON))
+        description = rng.choices(words, k=20) + rng.choices(COMMON, k=6)
+        rng.shuffle(description)
+        courses.append(
+            {
+                "course_code": f"{subject} {1000 + i}",
+                "course_name": " ".join(name).title(),
+                "credits": "4",
+                "description": " ".join(description),
+                "prerequisites": None,
+            }
+        )
+    return courses
+
+
+def labelled_queries(courses: list[dict], n: int, rng: random.Random) -> list:
+    by_name: dict[str, set[str]] = {}
+    for c in courses:
+        by_name.setdefault(c["course_name"], set()).add(c["course_code"])
+    queries = []
+    for _ in range(n):
+        course = rng.choice(courses)
+        relevant = by_name[course["course_name"]]
+        if rng.random() < 0.5:
+            queries.append(("title", course["course_name"], relevant))
+            continue
+        words = rng.sample(course["course_name"].lower().split(), 2)
+        words.append(rng.choice(course["description"].split()))
+        topic = f"{words[0]}, {words[1]} and {words[2]}"
+        queries.append(("natural", rng.choice(QUESTIONS).format(topic), relevant))
+    return queries
+
+
+def run(queries, fast_path: bool, lexical: bool, embedder):
+    config.lexical_fast_path = fast_path
+    timings, recall, embedded = [], {}, 0
+    for kind, query, relevant in queries:
+        clear_memos()
+        if not lexical:
+            Path(config.lexical_index).rename(f"{config.lexical_index}.off")
+        calls = embedder.calls
+        start = time.perf_counter()
+        nodes = course_retriever([query])
+        timings.append(time.perf_counter() - start)
+        embedded += embedder.calls > calls
+        if not lexical:
+            Path(f"{config.lexical_index}.off").rename(config.lexical_index)
+        codes = {node["node"]["metadata"]["course_code"] for node in nodes}
+        recall.setdefault(kind, []).append(
+            len(codes & relevant) / min(3, len(relevant))
+        )
+    recall = {kind: sum(values) / len(values) for kind, values in recall.items()}
+    return timings, recall, 1 - embedded / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--request-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    courses = field_courses(args.courses, rng)
+    queries = labelled_queries(courses, args.queries, rng)
+    nodes = [course_to_node(c, "bench.pdf") for c in courses]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.chroma_path = tmp
+        config.catalog_index = str(Path(tmp, "catalog.json"))
+        config.lexical_index = str(Path(tmp, "bm25.json"))
+        embedder = HashEmbeddingFunction(dim=512, request_latency=args.request_latency)
+        collection = chroma_handles.get_collection(embedding_function=embedder)
+        add_nodes(collection, nodes, HashEmbeddingFunction(dim=512), batch_size=256)
+        CatalogIndex(nodes).save(config.catalog_index)
+        BM25Index.build(nodes).save(config.lexical_index)
+
+        results = [
+            ("vector only (before)", *run(queries, False, False, embedder)),
+            ("BM25 + vector, RRF", *run(queries, False, True, embedder)),
+            ("RRF + lexical fast path", *run(queries, True, True, embedder)),
+        ]
+    for label, timings, recall, skipped in results:
+        report(label, timings)
+        per_kind = " ".join(f"{kind}={value:.3f}" for kind, value in recall.items())
+        print(f"{'':<32} recall@3 {per_kind}, no embedding {skipped:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Courses ingestion throughput: per-course adds vs batched, prefetched adds.
+
+Usage:
+    python benchmarks/bench_ingest_courses.py [--courses 2000] [--batch-size 128]
+
+The stub embedder sleeps once per request and per text to stand in for
+Ollama. "before" reproduces the old loop (one embedding request and one
+``collection.add`` per course). "after" is ``crec.ingestion.courses.add_nodes``.
+"""
+
+import argparse
+import tempfile
+import time
+
+from _stubs import HashEmbeddingFunction, synthetic_courses
+
+from crec.ingestion.courses import add_nodes, course_to_node
+from crec.tools import chroma_handles
+
+
+def fresh_collection(path: str, embedding_function):
+    return chroma_handles.get_client(path).get_or_create_collection(
+        name="courses", embedding_function=embedding_function
+    )
+
+
+def old_ingest(collection, nodes: list[dict]):
+    for node in nodes:
+        collection.add(
+            ids=[node["node"]["node_id"]],
+            documents=[node["node"]["text"]],
+            metadatas=[node["node"]["metadata"]],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--request-latency", type=float, default=0.01)
+    parser.add_argument("--item-latency", type=float, default=0.0005)
+    args = parser.parse_args()
+
+    nodes = [
+        course_to_node(c, "ug_bulletin.pdf") for c in synthetic_courses(args.courses)
+    ]
+    embedder = HashEmbeddingFunction(
+        request_latency=args.request_latency, item_latency=args.item_latency
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection = fresh_collection(f"{tmp}/before", embedder)
+        start = time.perf_counter()
+        old_ingest(collection, nodes)
+        elapsed = time.perf_counter() - start
+        print(f"{'before (per-course add)':<32} {len(nodes) / elapsed:8.1f} courses/s")
+
+        collection = fresh_collection(f"{tmp}/after", embedder)
+        start = time.perf_counter()
+        add_nodes(collection, nodes, embedder, args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{f'after (batch={args.batch_size})':<32} "
+            f"{collection.count() / elapsed:8.1f} courses/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
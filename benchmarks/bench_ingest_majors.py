@@ -0,0 +1,88 @@
+"""Majors ingestion throughput: files/sec with 1..N HTML splitting processes.
+
+Usage:
+    python benchmarks/bench_ingest_majors.py [--files 40] [--max-workers 4]
+
+Writes synthetic bulletin pages, each with a few majors from
+``HEADER_4_FILTER`` (paragraphs, lists and tables), then runs the majors
+pipeline from scratch with each worker count into a fresh store. Every run
+must store the same chunks. Scaling needs as many free cores as
+workers.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from _stubs import WORDS
+
+from crec.config import config
+from crec.ingestion import major_req_dict
+from crec.ingestion.major_req_dict import HEADER_4_FILTER
+from crec.tools.majors_store import MajorsStore
+
+
+def sentence(rng: random.Random, n: int = 14) -> str:
+    return " ".join(rng.choices(WORDS, k=n)).capitalize() + "."
+
+
+def major_page(rng: random.Random, index: int, majors_per_page: int = 4) -> str:
+    parts = [f"<html><body><h1>Bulletin {index}</h1><h2>Majors</h2>"]
+    for major in rng.sample(HEADER_4_FILTER, majors_per_page):
+        parts.append(f"<h4>{major}</h4>")
+        for _ in range(6):
+            parts.append(f"<p>{' '.join(sentence(rng) for _ in range(5))}</p>")
+        items = "".join(f"<li>{sentence(rng, 6)}</li>" for _ in range(8))
+        parts.append(f"<ul>{items}</ul>")
+        rows = "".join(
+            f"<tr><td>{rng.choice(WORDS).upper()} {rng.randint(100, 499)}</td>"
+            f"<td>{sentence(rng, 4)}</td><td>4</td></tr>"
+            for _ in range(10)
+        )
+        parts.append(f"<table>{rows}</table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def run(html_dir: Path, workers: int) -> tuple[float, dict]:
+    with tempfile.TemporaryDirectory() as state:
+        config.ingest_manifest = str(Path(state, "manifest.json"))
+        config.majors_db = str(Path(state, "majors.db"))
+        start = time.perf_counter()
+        major_req_dict.pipeline(html_dir, full=True, workers=workers)
+        elapsed = time.perf_counter() - start
+        with MajorsStore(config.majors_db) as store:
+            return elapsed, {major: store.chunks(major) for major in store.majors()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--max-workers", type=int, default=4)
+    args = parser.parse_args()
+    major_req_dict.log.setLevel("WARNING")
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        html_dir = Path(tmp)
+        for i in range(args.files):
+            html_dir.joinpath(f"bulletin_{i:03d}.html").write_text(
+                major_page(rng, i), encoding="utf-8"
+            )
+
+        baseline = None
+        for workers in range(1, args.max_workers + 1):
+            elapsed, majors = run(html_dir, workers)
+            if baseline is None:
+                baseline = majors
+            assert majors == baseline, "stores differ between worker counts"
+            print(
+                f"{workers} workers {elapsed:8.2f}s "
+                f"{args.files / elapsed:8.1f} files/s ({len(majors)} majors)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Micro-benchmark for major_retriever over a batch of misspelled major names.
+
+Usage:
+    python benchmarks/bench_major_retriever.py [--queries 500] [--chunks 20]
+
+"before" re-reads ``majors.json`` and runs ``thefuzz.process.extract`` on
+every call, as the retriever used to; "after" calls
+``crec.tools.major_ret.major_retriever``, which caches the major names of the
+SQLite majors store and reads only the matched majors' chunks. "cold" times
+the first call against the cost of parsing the whole ``majors.json`` once;
+raise ``--chunks`` to see that it no longer grows with the store.
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from _stubs import report
+from thefuzz import fuzz as thefuzz_fuzz, process as thefuzz_process
+
+from crec.config import config
+from crec.ingestion.major_req_dict import HEADER_4_FILTER
+from crec.tools.major_ret import major_retriever
+from crec.tools.majors_store import MajorsStore
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    """Apply one or two character edits and sometimes drop the program prefix."""
+    if "/" in name and rng.random() < 0.5:
+        name = name.split("/")[-1].strip()
+    chars = list(name)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        op = rng.random()
+        if op < 0.33:
+            del chars[i]
+        elif op < 0.66:
+            chars.insert(i, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+        else:
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars).lower()
+
+
+def old_major_retriever(path: str, major_queries: list[str]) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        majors = json.load(f)
+    result = []
+    for major_query in major_queries:
+        for match in thefuzz_process.extract(
+            major_query, majors.keys(), scorer=thefuzz_fuzz.token_set_ratio, limit=1
+        ):
+            result.append(majors.get(match[0]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--chunks", type=int, default=20, help="chunks per major")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    majors = {
+        name: [
+            {
+                "text": " ".join(["requirement"] * 150),
+                "metadata": {"Header 4": name, "file_name": "bulletin.html"},
+            }
+            for _ in range(args.chunks)
+        ]
+        for name in HEADER_4_FILTER
+    }
+    queries = [
+        [misspell(rng.choice(HEADER_4_FILTER), rng) for _ in range(2)]
+        for _ in range(args.queries)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp).joinpath("majors.json"))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(majors, f, indent=2)
+        config.majors_db = str(Path(tmp).joinpath("majors.db"))
+        with MajorsStore(config.majors_db) as store:
+            store.replace_file(
+                "bulletin.html", "", [c for v in majors.values() for c in v]
+            )
+
+        start = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            json.load(f)
+        json_load = time.perf_counter() - start
+        start = time.perf_counter()
+        major_retriever(queries[0])
+        cold = time.perf_counter() - start
+
+        before, after = [], []
+        agree = 0
+        for batch in queries:
+            start = time.perf_counter()
+            old = old_major_retriever(path, batch)
+            before.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            new = major_retriever(batch)
+            after.append(time.perf_counter() - start)
+            agree += old == new
+
+    report("before (load + thefuzz per call)", before)
+    report("after (cached names, lazy chunks)", after)
+    print(
+        f"cold: parse majors.json {json_load * 1000:.1f}ms, first call {cold * 1000:.1f}ms"
+    )
+    print(f"same result as before: {agree}/{len(queries)} calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Bulletin PDF parsing: whole-text regex vs page-streaming, page-parallel parsing.
+
+Usage:
+    python benchmarks/bench_parse_bulletin.py [--courses 4000] [--files 2] [--workers 4]
+
+Writes synthetic bulletins of several hundred pages, with records running
+across page breaks. It then parses them with the previous
+``parse_course_descriptions`` (string concatenation plus one DOTALL regex),
+the streaming parser on one process, and ``parse_bulletins`` with a process
+pool. Outputs are checked to be identical.
+"""
+
+import argparse
+import re
+import tempfile
+import time
+
+from _stubs import synthetic_courses, write_bulletin_pdf
+from pypdf import PdfReader
+
+from crec.ingestion.courses import parse_bulletins, parse_course_descriptions
+
+
+def old_parse_course_descriptions(pdf_path):
+    reader = PdfReader(pdf_path)
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n"
+    pattern = (
+        r"([A-Z]+\s+\d{3})\s+([^\(]+)\((\d+)\s+credits?\)(.*?)(?=\n[A-Z]+\s+\d{3}\s+|$)"
+    )
+    courses = []
+    for match in re.finditer(pattern, text, re.DOTALL):
+        full_text = match.group(4).strip()
+        prereq_pattern = (
+            r"((?:Prerequisite\(s\)|Pre/Co-requisite\(s\)):\s*.+?)(?=\n\n|\Z)"
+        )
+        prereq_match = re.search(prereq_pattern, full_text, re.DOTALL)
+        prerequisites = prereq_match.group(1).strip() if prereq_match else None
+        if prerequisites:
+            description = re.split(
+                r"(?:Prerequisite\(s\)|Pre/Co-requisite\(s\)):", full_text
+            )[0].strip()
+        else:
+            description = full_text.strip()
+        courses.append(
+            {
+                "course_code": match.group(1).strip(),
+                "course_name": match.group(2).strip(),
+                "credits": match.group(3).strip(),
+                "description": description,
+                "prerequisites": prerequisites,
+            }
+        )
+    return courses
+
+
+def timed(label: str, fn, n_courses: int):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {elapsed:8.2f}s {n_courses / elapsed:9.1f} courses/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=4000)
+    parser.add_argument("--files", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.files):
+            path = f"{tmp}/ug_bulletin_{i}.pdf"
+            pages = write_bulletin_pdf(path, synthetic_courses(args.courses, seed=i))
+            paths.append(path)
+        total = args.courses * args.files
+        print(f"{args.files} bulletins x {pages} pages, {total} courses")
+
+        old = timed(
+            "before (concat + DOTALL regex)",
+            lambda: {p: old_parse_course_descriptions(p) for p in paths},
+            total,
+        )
+        streaming = timed(
+            "streaming, 1 process",
+            lambda: {p: parse_course_descriptions(p) for p in paths},
+            total,
+        )
+        parallel = timed(
+            f"streaming, {args.workers} workers",
+            lambda: parse_bulletins(paths, args.workers),
+            total,
+        )
+        assert old == streaming == parallel, "parsers disagree"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Lookup latency on a synthetic multi-term schedule, with and without indexes.
+
+Usage:
+    python benchmarks/bench_schedule_db.py [--terms 4] [--sections-per-term 15000]
+
+Loads several term CSVs into one database through the schedule ingestion
+pipeline, times ``schedule_retriever`` lookups, then drops the composite
+indexes and times the same lookups again as full table scans.
+"""
+
+import argparse
+import logging
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from _stubs import SUBJECTS, report
+from bench_schedule_retriever import write_csv
+
+from crec.config import config
+from crec.ingestion import schedule
+from crec.tools import schedule_ret, sqlite_pool
+from crec.tools.schedule_ret import schedule_retriever
+
+TERMS = ["spring_2025", "fall_2025", "spring_2026", "fall_2026", "summer_2026"]
+
+
+def time_lookups(lookups: list) -> list[float]:
+    timings = []
+    for subject, catalog_num in lookups:
+        start = time.perf_counter()
+        schedule_retriever(subject, catalog_num)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terms", type=int, default=4)
+    parser.add_argument("--sections-per-term", type=int, default=15000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    schedule_ret.log.setLevel(logging.WARNING)
+    rng = random.Random(1)
+    lookups = [
+        (rng.choice(SUBJECTS), rng.randrange(100, 500)) for _ in range(args.lookups)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp).joinpath("schedule.db"))
+        config.schedule_db = db_path
+        schedule.init_db(db_path)
+        for term in TERMS[: args.terms]:
+            csv_path = Path(tmp).joinpath(f"{term}.csv")
+            write_csv(csv_path, args.sections_per_term)
+            schedule.load_csv_into_db(db_path, str(csv_path))
+        config.schedule_term = TERMS[args.terms - 1]
+
+        with sqlite3.connect(db_path) as conn:
+            total = conn.execute("SELECT COUNT(*) FROM schedule").fetchone()[0]
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM schedule "
+                "WHERE term = ? AND subject = ? AND catalog_num IN (?)",
+                (config.schedule_term, "MATH", "101"),
+            ).fetchall()
+        print(f"{total} sections across {args.terms} terms")
+        print("plan:", "; ".join(row[-1] for row in plan))
+
+        indexed = time_lookups(lookups)
+
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DROP INDEX idx_schedule_term_subject_catalog")
+            conn.execute("DROP INDEX idx_schedule_term_session_subject")
+            conn.execute("ANALYZE")
+        sqlite_pool.close_all()
+        scanned = time_lookups(lookups)
+
+    report("without indexes (table scan)", scanned)
+    report("with composite indexes", indexed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Throughput of schedule lookups from concurrent threads.
+
+Usage:
+    python benchmarks/bench_schedule_retriever.py [--sections 5000] [--lookups 2000]
+
+"before" opens a connection per lookup and builds ``Schedule`` objects by
+zipping ``model_fields``, as ``schedule_retriever`` used to; "after" calls
+``schedule_retriever`` with the pooled read-only connections.
+"""
+
+import argparse
+import csv
+import logging
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from _stubs import SUBJECTS
+
+from crec.config import config
+from crec.ingestion import schedule
+from crec.tools import schedule_ret
+from crec.tools.schedule_ret import Schedule, schedule_retriever
+
+SQL = """
+    SELECT id, session, subject, catalog_num, section,
+    course_name, start_time, end_time, scheduled_days, credits
+    FROM schedule
+    WHERE term = ?
+    AND subject = ?
+    AND catalog_num IN (?);
+"""
+
+
+def write_csv(path: Path, n: int) -> None:
+    rng = random.Random(0)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "Session",
+                "Subject",
+                "Catalog",
+                "Section",
+                "Descr",
+                "Mtg Start",
+                "Mtg End",
+                "Schedule Days",
+                "Max Units",
+            ]
+        )
+        for i in range(n):
+            writer.writerow(
+                [
+                    rng.choice(["7W1", "7W2"]),
+                    SUBJECTS[i % len(SUBJECTS)],
+                    str(100 + (i // len(SUBJECTS)) % 400),
+                    f"{i % 3:03d}",
+                    "Synthetic Course",
+                    "10:00AM",
+                    "11:15AM",
+                    "MoWe",
+                    rng.choice([2, 4]),
+                ]
+            )
+
+
+def old_lookup(db_path: str, subject: str, catalog_num: int) -> list[Schedule]:
+    with sqlite3.connect(db_path) as conn:
+        temp = conn.execute(
+            SQL, (config.schedule_term, subject, catalog_num)
+        ).fetchall()
+    return [Schedule(**dict(zip(Schedule.model_fields.keys(), t))) for t in temp]
+
+
+def new_lookup(db_path: str, subject: str, catalog_num: int) -> list[Schedule]:
+    return schedule_retriever(subject, catalog_num)
+
+
+def run(fn, db_path: str, lookups: list, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda args: fn(db_path, *args), lookups))
+    return len(lookups) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sections", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    schedule_ret.log.setLevel(logging.WARNING)
+    rng = random.Random(1)
+    lookups = [
+        (rng.choice(SUBJECTS), rng.randrange(100, 500)) for _ in range(args.lookups)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp).joinpath("schedule.db"))
+        csv_path = Path(tmp).joinpath("schedule.csv")
+        write_csv(csv_path, args.sections)
+        schedule.init_db(db_path)
+        schedule.load_csv_into_db(db_path, str(csv_path))
+        config.schedule_db = db_path
+
+        for threads in (1, 4, 8, 16):
+            before = run(old_lookup, db_path, lookups, threads)
+            after = run(new_lookup, db_path, lookups, threads)
+            print(
+                f"threads={threads:<3} before={before:9.0f} lookups/s "
+                f"after={after:9.0f} lookups/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
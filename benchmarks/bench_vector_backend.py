@@ -0,0 +1,159 @@
+"""Course vector search: persistent Chroma collection vs the NumPy backend.
+
+Usage:
+    python benchmarks/bench_vector_backend.py [--courses 4000] [--dim 768]
+
+Both backends hold the same synthetic course embeddings. Startup is opening
+the collection or memory-mapping the export, through the first query, in a
+fresh process (imports excluded). Query latency is one batch of ``--batch`` pre-embedded text
+queries, top ``--k``, as ``course_retriever`` sends them. The NumPy results
+are exact; the report gives the HNSW recall against them and checks that
+both return the same node dicts for the ids they share. It also checks that
+an empty collection exports and answers with no results.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from _stubs import report, synthetic_courses
+from chromadb.config import Settings
+
+from crec.ingestion.courses import course_to_node
+from crec.tools.course_ret import chroma_result_to_nodes
+from crec.tools.vector_index import NumpyVectorIndex
+
+
+def open_collection(path: str):
+    client = chromadb.PersistentClient(
+        path=path, settings=Settings(anonymized_telemetry=False)
+    )
+    return client.get_or_create_collection("courses", embedding_function=None)
+
+
+STARTUP = """
+import sys, time
+import numpy as np
+backend, path, k, dim = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+query = np.ones((1, dim), dtype=np.float32)
+if backend == "chroma":
+    from bench_vector_backend import open_collection
+    start = time.perf_counter()
+    open_collection(path).query(query_embeddings=query, n_results=k)
+else:
+    from crec.tools.vector_index import NumpyVectorIndex
+    start = time.perf_counter()
+    NumpyVectorIndex.load(path + "/course_vectors").query(query, k)
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start(backend: str, path: str, args) -> float:
+    """Seconds from opening the backend to the first answer, in a new process."""
+    out = subprocess.run(
+        [sys.executable, "-c", STARTUP, backend, path, str(args.k), str(args.dim)],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    return float(out.stdout.split()[-1])
+
+
+def _row(result: dict, i: int) -> dict:
+    """The `i`-th query of a batched query result, as a one-query result."""
+    return {
+        key: [result[key][i]] for key in ("ids", "documents", "metadatas", "distances")
+    }
+
+
+def check_empty(tmp: str, dim: int) -> bool:
+    """Export an empty collection and query it, as ingesting an empty
+    catalog does."""
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    empty = client.get_or_create_collection("empty", embedding_function=None)
+    prefix = Path(tmp, "empty_vectors")
+    NumpyVectorIndex.from_collection(empty).save(prefix)
+    result = NumpyVectorIndex.load(prefix).query(np.ones((2, dim)), 5)
+    return result["ids"] == [[], []]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=4000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    nodes = [course_to_node(c, "bench.pdf") for c in synthetic_courses(args.courses)]
+    nodes = list({n["node"]["node_id"]: n for n in nodes}.values())
+    vectors = rng.normal(size=(len(nodes), args.dim)).astype(np.float32)
+    queries = [
+        rng.normal(size=(args.batch, args.dim)).astype(np.float32)
+        for _ in range(args.calls)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection = open_collection(tmp)
+        for start in range(0, len(nodes), 1000):
+            batch = nodes[start : start + 1000]
+            collection.add(
+                ids=[n["node"]["node_id"] for n in batch],
+                documents=[n["node"]["text"] for n in batch],
+                metadatas=[n["node"]["metadata"] for n in batch],
+                embeddings=vectors[start : start + 1000],
+            )
+        empty_ok = check_empty(tmp, args.dim)
+        prefix = Path(tmp, "course_vectors")
+        NumpyVectorIndex.from_collection(collection).save(prefix)
+        del collection
+        chroma_start = cold_start("chroma", tmp, args)
+        numpy_start = cold_start("numpy", tmp, args)
+        collection = open_collection(tmp)
+        index = NumpyVectorIndex.load(prefix)
+
+        chroma_times, numpy_times, recall, same = [], [], 0.0, True
+        for batch in queries:
+            start = time.perf_counter()
+            chroma = collection.query(query_embeddings=batch, n_results=args.k)
+            chroma_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            exact = index.query(batch, args.k)
+            numpy_times.append(time.perf_counter() - start)
+
+            for row in range(len(batch)):
+                got = chroma_result_to_nodes(_row(chroma, row))
+                want = chroma_result_to_nodes(_row(exact, row))
+                by_id = {n["node"]["node_id"]: n for n in got}
+                recall += len(by_id.keys() & {n["node"]["node_id"] for n in want})
+                for node in want:
+                    other = by_id.get(node["node"]["node_id"])
+                    if other is not None:
+                        same &= other["node"] == node["node"]
+                        same &= bool(
+                            np.isclose(other["score"], node["score"], rtol=1e-4)
+                        )
+    recall /= args.calls * args.batch * args.k
+
+    print(f"{len(nodes)} courses x {args.dim} dims, batches of {args.batch}")
+    print(
+        f"startup: chroma {chroma_start * 1000:.1f}ms, numpy {numpy_start * 1000:.1f}ms"
+    )
+    report("chroma (HNSW)", chroma_times)
+    report("numpy (exact)", numpy_times)
+    print(f"HNSW recall@{args.k} vs exact: {recall:.3f}")
+    print(f"same node dicts on shared ids: {same}")
+    print(f"empty collection exports and answers: {empty_ok}")
+
+
+if __name__ == "__main__":
+    main()
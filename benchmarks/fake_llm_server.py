@@ -0,0 +1,163 @@
+"""Minimal OpenAI-compatible chat completions server for load tests.
+
+It answers every ``POST /v1/chat/completions`` after a fixed delay, filling
+in whichever DSPy output fields the prompt asks for (``next_tool_name`` ->
+``finish``, ``response`` -> canned text, ...). Streaming requests get the
+answer as server-sent events. It runs on asyncio, so hundreds of requests can
+wait on it at once without a thread each.
+
+Usage:
+    python benchmarks/fake_llm_server.py [--port 8799] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+
+FIELD_PATTERN = re.compile(r"\[\[ ## (\w+) ## \]\]")
+
+CANNED = {
+    "next_thought": "I have what I need.",
+    "next_tool_name": "finish",
+    "next_tool_args": "{}",
+    "next_tool_calls": '[{"name": "finish", "args": {}}]',
+    "reasoning": "The student asked for a plan.",
+    "response": (
+        "Here is a schedule that balances your major requirements with "
+        "electives across both sessions of the semester."
+    ),
+}
+
+
+def answer_for(messages: list[dict]) -> str:
+    """Build a ChatAdapter-formatted answer for the fields the prompt requests."""
+    last = messages[-1]["content"] if messages else ""
+    if isinstance(last, list):
+        last = " ".join(part.get("text", "") for part in last)
+    instruction = last[last.rfind("Respond with the corresponding output fields") :]
+    fields = [f for f in FIELD_PATTERN.findall(instruction) if f != "completed"]
+    parts = [f"[[ ## {f} ## ]]\n{CANNED.get(f, 'ok')}" for f in fields]
+    parts.append("[[ ## completed ## ]]")
+    return "\n\n".join(parts)
+
+
+def _completion(content: str, model: str) -> dict:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _chunk(content: str, model: str, finish_reason=None) -> bytes:
+    payload = {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "delta": {"content": content} if content else {},
+                "finish_reason": finish_reason,
+            }
+        ],
+    }
+    return f"data: {json.dumps(payload)}\n\n".encode()
+
+
+class FakeLLMServer:
+    """Serve canned chat completions with ``latency`` seconds of delay.
+
+    Args:
+        latency: Delay before the first byte of every response.
+        chunk_delay: Delay between streamed chunks.
+    """
+
+    def __init__(self, latency: float = 0.5, chunk_delay: float = 0.01):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    key, _, value = line.decode().partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                await self._respond(writer, json.loads(body or b"{}"))
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, request: dict):
+        self.requests += 1
+        model = request.get("model", "fake")
+        content = answer_for(request.get("messages", []))
+        await asyncio.sleep(self.latency)
+
+        if not request.get("stream"):
+            body = json.dumps(_completion(content, model)).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+                + f"content-length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\ncontent-type: text/event-stream\r\n"
+            b"transfer-encoding: chunked\r\n\r\n"
+        )
+        pieces = [content[i : i + 16] for i in range(0, len(content), 16)]
+        events = [_chunk(p, model) for p in pieces]
+        events.append(_chunk("", model, finish_reason="stop"))
+        events.append(b"data: [DONE]\n\n")
+        for event in events:
+            writer.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            await writer.drain()
+            await asyncio.sleep(self.chunk_delay)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+async def _main(port: int, latency: float):
+    server = FakeLLMServer(latency=latency)
+    port = await server.start(port=port)
+    print(f"Fake LLM listening on http://127.0.0.1:{port}/v1")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(_main(args.port, args.latency))
@@ -0,0 +1,117 @@
+"""Concurrent-conversation load test for the streaming ASGI ``/chat`` endpoint.
+
+Usage:
+    python benchmarks/load_test_chat.py [--clients 50] [--turns 2] [--llm-latency 0.5]
+
+An in-process fake OpenAI-compatible server (``fake_llm_server.py``) stands in
+for the LLM, so each model call costs ``--llm-latency`` seconds of wall time
+without any compute. ``create_asgi_app`` is served by uvicorn and ``--clients``
+conversations post to ``/chat`` at once. Time to first byte, full-turn latency
+and turn throughput are reported.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import warnings
+
+import dspy
+import httpx
+import uvicorn
+from _stubs import StubMemoryTools, report
+from fake_llm_server import FakeLLMServer
+from flask import Flask
+
+from app.asgi import create_asgi_app
+from app.sessions import SessionManager
+from crec.agent import Agent
+
+
+async def conversation(base_url: str, turns: int, ttfb, latency):
+    # One client per conversation, so its cookie jar carries the session.
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        for _ in range(turns):
+            await turn(client, ttfb, latency)
+
+
+async def turn(client: httpx.AsyncClient, ttfb, latency):
+    start = time.perf_counter()
+    first = None
+    async with client.stream(
+        "POST", "/chat", json={"message": "Plan my CS courses"}
+    ) as response:
+        response.raise_for_status()
+        async for _ in response.aiter_bytes():
+            if first is None:
+                first = time.perf_counter() - start
+    ttfb.append(first)
+    latency.append(time.perf_counter() - start)
+
+
+async def main_async(args):
+    llm = FakeLLMServer(latency=args.llm_latency)
+    llm_port = await llm.start()
+    dspy.configure(
+        lm=dspy.LM(
+            "openai/fake",
+            api_base=f"http://127.0.0.1:{llm_port}/v1",
+            api_key="fake",
+            cache=False,
+        )
+    )
+
+    flask_app = Flask(__name__)
+    flask_app.sessions = SessionManager(
+        lambda session_id: Agent(memory_tools=StubMemoryTools(), streaming=True)
+    )
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_asgi_app(flask_app),
+            port=args.port,
+            log_level="warning",
+            lifespan="on",
+        )
+    )
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    ttfb, latency = [], []
+    base_url = f"http://127.0.0.1:{args.port}"
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            conversation(base_url, args.turns, ttfb, latency)
+            for _ in range(args.clients)
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    server.should_exit = True
+    await serve
+    await llm.stop()
+
+    report("time to first byte", ttfb)
+    report("turn latency", latency)
+    print(f"{'sessions':<32} {len(flask_app.sessions)}")
+    print(
+        f"{'throughput':<32} {len(latency) / elapsed:8.2f} turns/s "
+        f"({llm.requests} LLM requests in {elapsed:.2f}s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8798)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
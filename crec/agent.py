@@ -1,12 +1,21 @@
+import asyncio
 import time
+from typing import Optional
 
 import dspy
 import mlflow
+from mem0 import Memory
 from crec.conversation_memory import MemoryTools, ConversationMemory
+from crec.embedding_cache import cache_mem0_embedder
+from crec.memory_writer import MemoryWriter
 from crec.tools.course_ret import course_retriever
 from crec.tools.major_ret import major_retriever
 from crec.tools.schedule_ret import schedule_retriever
+from crec.tools.memo import MemoScope, memo_scope
+from crec.tools.offthread import offthread_tools
 from crec.config import config
+from crec.parallel_react import ParallelReAct
+from crec.response_cache import CacheLookup, ResponseCache
 from crec.synthesizer import Synthesizer
 
 
@@ -39,12 +48,56 @@ class AgentSignature(dspy.Signature):
     response: str = dspy.OutputField()
 
 
+class SummarizeHistory(dspy.Signature):
+    """Update the running summary of a course planning conversation with the
+    turns that are about to leave the context window.
+
+    Keep what later turns may rely on: the student's major, year, completed
+    courses, preferences, constraints and any decisions made. Drop greetings
+    and repetition. Be concise.
+    """
+
+    previous_summary: str = dspy.InputField()
+    turns: str = dspy.InputField()
+    summary: str = dspy.OutputField()
+
+
+def default_memory_config() -> dict:
+    """Mem0 config backed by the local Chroma memory store and Ollama."""
+    return {
+        "vector_store": {
+            "provider": "chroma",
+            "config": {
+                "collection_name": config.mem_col,
+                "path": config.mem_chroma,
+            },
+        },
+        "embedder": {
+            "provider": "ollama",
+            "config": {"model": config.embedding},
+        },
+        "llm": {
+            "provider": "ollama",
+            "config": {
+                "model": config.llm,
+                "temperature": 0.1,
+                "max_tokens": 2500,
+            },
+        },
+    }
+
+
 class Agent(dspy.Module):
     def __init__(
         self,
         max_iterations: int = 5,
         streaming: bool = False,
         previous_conversation: list = None,
+        parallel_tools: bool = False,
+        max_parallel_tools: int = 4,
+        memory_tools: MemoryTools = None,
+        history_token_budget: int = None,
+        response_cache: ResponseCache = None,
     ):
         """
         Args:
@@ -55,35 +108,38 @@ class Agent(dspy.Module):
                 for `reponse` returned by synthesizer, else simply return the
                 complete response as a string.
             previous_conversation: List of User-Assistant conversation retrieved from the database.
+            parallel_tools: If `True`, the agent may emit several independent
+                tool calls per round and they run concurrently, instead of one
+                tool call per round.
+            max_parallel_tools: Upper bound on tool calls running at once when
+                `parallel_tools` is enabled.
+            memory_tools: Long-term memory tools to use. Built from the default
+                mem0 config, writing through a background `MemoryWriter`,
+                when omitted.
+            history_token_budget: Estimated tokens the conversation history may
+                take in a prompt; older turns are summarized beyond it.
+                Defaults to `config.history_share` of `config.context_window`.
+            response_cache: Semantic cache of final answers, usually shared
+                between sessions. Turns that follow earlier turns or ask in
+                the first person skip it.
         """
 
         super().__init__()
         self.streaming = streaming
         self.prev_response = None
-
-        memory_config = {
-            "vector_store": {
-                "provider": "chroma",
-                "config": {
-                    "collection_name": config.mem_col,
-                    "path": config.mem_chroma,
-                },
-            },
-            "embedder": {
-                "provider": "ollama",
-                "config": {"model": config.embedding},
-            },
-            "llm": {
-                "provider": "ollama",
-                "config": {
-                    "model": config.llm,
-                    "temperature": 0.1,
-                    "max_tokens": 2500,
-                },
-            },
-        }
-        self.memory_tools = MemoryTools(memory_config)
-        self.conversation_memory = ConversationMemory()
+        self.response_cache = response_cache
+        # Tool results memoized for this conversation.
+        self.tool_memo = MemoScope()
+
+        if memory_tools is None:
+            memory = cache_mem0_embedder(Memory.from_config(default_memory_config()))
+            memory_tools = MemoryTools(memory=memory, writer=MemoryWriter(memory))
+        self.memory_tools = memory_tools
+        self.history_token_budget = history_token_budget or int(
+            config.context_window * config.history_share
+        )
+        self.summarize_history = dspy.Predict(SummarizeHistory)
+        self.conversation_memory = self._new_conversation_memory()
 
         # TODO: Conversation history
         try:
@@ -101,23 +157,49 @@ class Agent(dspy.Module):
         except Exception as e:
             print(f"error encountered in loading conversation: {e}")
 
-        self.agent = dspy.ReAct(
-            signature=AgentSignature,
-            tools=[
+        # Off-thread tools keep the blocking retrievers off the event loop
+        # in `aforward` and behave like plain tools in `forward`.
+        tools = offthread_tools(
+            [
                 self.memory_tools.search_memories,
                 self.memory_tools.get_all_memories,
                 course_retriever,
                 major_retriever,
                 schedule_retriever,
-            ],
-            max_iters=max_iterations,
+            ]
         )
+        if parallel_tools:
+            self.agent = ParallelReAct(
+                signature=AgentSignature,
+                tools=tools,
+                max_iters=max_iterations,
+                max_workers=max_parallel_tools,
+            )
+        else:
+            self.agent = dspy.ReAct(
+                signature=AgentSignature,
+                tools=tools,
+                max_iters=max_iterations,
+            )
 
         self.synthesizer = Synthesizer()
 
     def reset(self):
         self.prev_response = None
-        self.conversation_memory = ConversationMemory()
+        self.tool_memo = MemoScope()
+        self.conversation_memory = self._new_conversation_memory()
+
+    def _new_conversation_memory(self) -> ConversationMemory:
+        return ConversationMemory(
+            token_budget=self.history_token_budget,
+            summarizer=self._summarize,
+        )
+
+    def _summarize(self, previous_summary: str, entries: list) -> str:
+        turns = "\n".join(f"{e.role}: {e.content}" for e in entries)
+        return self.summarize_history(
+            previous_summary=previous_summary, turns=turns
+        ).summary
 
     def _forward(self, user_query: str):
         history = self.conversation_memory.history_str()
@@ -146,7 +228,36 @@ class Agent(dspy.Module):
             user_query=user_query, conversation_history=history
         )
 
-        synthesizer_args = {
+        synthesizer_args = self._synthesizer_args(user_query, intermediate_result)
+        self.prev_response = self.synthesizer(**synthesizer_args)
+
+        return self.prev_response
+
+    async def _aforward(self, user_query: str):
+        history = self.conversation_memory.history_str()
+
+        intermediate_result = await self.agent.acall(
+            user_query=user_query, conversation_history=history
+        )
+
+        synthesizer_args = self._synthesizer_args(user_query, intermediate_result)
+        self.prev_response = await self.synthesizer.acall(**synthesizer_args)
+
+        return self.prev_response
+
+    def _cache_lookup(
+        self, user_query: str, bypass_cache: bool
+    ) -> Optional[CacheLookup]:
+        if self.response_cache is None or bypass_cache:
+            return None
+        if self.response_cache.should_bypass(
+            user_query, has_history=bool(self.conversation_memory.history)
+        ):
+            return None
+        return self.response_cache.lookup(user_query)
+
+    def _synthesizer_args(self, user_query: str, intermediate_result) -> dict:
+        return {
             "conversation_memory": self.conversation_memory,
             "agent_reasoning": intermediate_result.reasoning,
             "agent_output": intermediate_result.response,
@@ -154,18 +265,30 @@ class Agent(dspy.Module):
             "streaming": self.streaming,
         }
 
-        self.prev_response = self.synthesizer(**synthesizer_args)
-
-        return self.prev_response
-
-    def forward(self, user_query: str):
-        gen = self._forward(
-            user_query,
+    def _save_turn(self, user_query: str, response: str):
+        self.conversation_memory.save(
+            role="user",
+            content=user_query,
+        )
+        self.conversation_memory.save(
+            role="assistant",
+            content=response,
         )
 
+    def forward(self, user_query: str, bypass_cache: bool = False):
+        lookup = self._cache_lookup(user_query, bypass_cache)
+        if lookup is not None and lookup.response is not None:
+            gen = self.prev_response = dspy.Prediction(response=lookup.response)
+        else:
+            with memo_scope(self.tool_memo):
+                gen = self._forward(
+                    user_query,
+                )
+
         response = ""
 
-        if self.streaming:
+        # A cached answer is a plain string even when streaming.
+        if self.streaming and not isinstance(gen.response, str):
             first_token = True
             for chunk in gen.response:
                 if isinstance(chunk, dspy.streaming.StreamResponse):
@@ -181,14 +304,10 @@ class Agent(dspy.Module):
             response = gen.response
             yield response
 
-        self.conversation_memory.save(
-            role="user",
-            content=user_query,
-        )
-        self.conversation_memory.save(
-            role="assistant",
-            content=response,
-        )
+        if lookup is not None and lookup.response is None:
+            self.response_cache.store(lookup, response)
+
+        self._save_turn(user_query, response)
 
         self.memory_tools.store_memory(
             [
@@ -198,6 +317,52 @@ class Agent(dspy.Module):
         )
         return dspy.Prediction(response)
 
+    async def aforward(self, user_query: str, bypass_cache: bool = False):
+        """Async counterpart of `forward`, iterated with `async for`.
+
+        LM calls go through DSPy's async path and the blocking tools run in
+        worker threads, so one event loop can serve many conversations.
+        """
+        lookup = await asyncio.to_thread(self._cache_lookup, user_query, bypass_cache)
+        if lookup is not None and lookup.response is not None:
+            gen = self.prev_response = dspy.Prediction(response=lookup.response)
+        else:
+            with memo_scope(self.tool_memo):
+                gen = await self._aforward(
+                    user_query,
+                )
+
+        response = ""
+
+        if self.streaming and not isinstance(gen.response, str):
+            first_token = True
+            async for chunk in gen.response:
+                if isinstance(chunk, dspy.streaming.StreamResponse):
+                    first_token = False
+                    yield chunk.chunk
+
+                elif isinstance(chunk, dspy.Prediction):
+                    response = chunk.response
+                    if first_token:
+                        yield response
+        else:
+            response = gen.response
+            yield response
+
+        if lookup is not None and lookup.response is None:
+            self.response_cache.store(lookup, response)
+
+        # Saving may summarize old turns with an LM call.
+        await asyncio.to_thread(self._save_turn, user_query, response)
+
+        await asyncio.to_thread(
+            self.memory_tools.store_memory,
+            [
+                {"role": "user", "content": user_query},
+                {"role": "assistant", "content": response},
+            ],
+        )
+
 
 def main():
     # Tell MLflow about the server URI.
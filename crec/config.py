@@ -43,7 +43,6 @@ class Config:
     # Internal: initialize defaults once
     def _initialize_defaults(self):
         db_dir = Path(__file__).parent.parent.joinpath("dbs/")
-        data_dir = Path(__file__).parent.parent.joinpath("data/")
         API_KEY = _env("API_KEY")
         self._store.update(
             {
@@ -55,20 +54,68 @@ class Config:
                 "embedding": "embeddinggemma",
                 "tei_url": "http://localhost:46515",
                 "context_window": 8000,
+                "embedding_cache": str(db_dir.joinpath("embedding_cache.sqlite")),
+                "embedding_cache_size": 4096,
+                # Assumed ms per embedding for saved_ms before any is timed.
+                "embedding_cost_ms": 30.0,
+                # Share of context_window for conversation history; older
+                # turns are folded into a summary beyond it.
+                "history_share": 0.25,
                 # Documents
                 "data_dir": "/datapool/course-rec",
                 "nodes_path": "/datapool/course-rec/nodes.json",
                 "pipeline_cache": "./pipeline_cache",
-                "majors_doc": str(data_dir.joinpath("majors.json")),
+                # Source-file and record hashes from the last ingestion run.
+                "ingest_manifest": str(db_dir.joinpath("ingest_manifest.json")),
+                # Processes for PDF/HTML parsing; None uses every CPU.
+                "ingest_workers": None,
+                # Courses embedded and written to Chroma per request.
+                "ingest_batch_size": 128,
+                # Major chunks by Header 4, written file by file during ingestion.
+                "majors_db": str(db_dir.joinpath("majors.db")),
                 # Chroma
                 "chroma_path": str(db_dir.joinpath("chroma_data/")),
                 "major_req_col": "major_req_col",
                 "courses_col": "courses",
+                # HNSW index of the courses collection; tune with
+                # `python -m crec.tune_hnsw`. Space, ef_construction and M take
+                # effect on a rebuild (`setup.py --full`); ef_search on any
+                # ingestion run, once the collection is next opened.
+                "courses_hnsw_space": "l2",
+                "courses_hnsw_ef_construction": 100,
+                "courses_hnsw_m": 16,
+                "courses_hnsw_ef_search": 100,
+                # Courses per free-text query and records per exact course code.
+                "course_text_k": 3,
+                "course_code_k": 1,
+                # "chroma", or "numpy" for exact in-process search over the
+                # embeddings exported to course_vectors (.npy + .json).
+                "course_vector_backend": "chroma",
+                "course_vectors": str(db_dir.joinpath("course_vectors")),
+                "catalog_index": str(db_dir.joinpath("course_catalog.json")),
+                # BM25 index over the catalog, fused with the vector search.
+                "lexical_index": str(db_dir.joinpath("course_bm25.json")),
+                # Answer queries that are exactly a course name without embedding.
+                "lexical_fast_path": False,
                 # SQLite
                 "schedule_db": str(db_dir.joinpath("schedule.db")),
+                # Term schedule_retriever reads; CSVs named e.g. "Fall 2026.csv"
+                # load as their own term, others load under this one. A season
+                # alone reads its latest loaded year, None the latest term.
+                "schedule_term": "spring",
                 # Mem0 config
                 "mem_chroma": str(db_dir.joinpath("chroma_memory")),
                 "mem_col": "test",
+                # Semantic cache of final answers, shared across sessions
+                "response_cache": False,
+                "response_cache_threshold": 0.95,
+                "response_cache_ttl": 3600,
+                "response_cache_size": 512,
+                # Web sessions
+                "max_sessions": 256,
+                # Signs session cookies; drawn per process when unset.
+                "session_secret": _env("SESSION_SECRET"),
+                "session_idle_ttl": 3600,
             }
         )
         # refresh read-only view
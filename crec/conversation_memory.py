@@ -1,25 +1,67 @@
+import contextvars
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 
 from mem0 import Memory
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Callable, NamedTuple, Optional
+
+from crec.embedding_cache import cache_mem0_embedder
+from crec.memory_writer import MemoryWriter
+
+log = logging.getLogger(__file__)
+# Runs `ConversationMemory.summarizer` calls off the `save` path.
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarize")
 
 
 class MemoryTools:
     """Tools for interacting with the Mem0 memory system."""
 
-    def __init__(self, memory_config: dict):
-        self.memory = Memory.from_config(memory_config)
+    def __init__(
+        self,
+        memory_config: dict = None,
+        memory: Memory = None,
+        user_id: str = "default_user",
+        writer: MemoryWriter = None,
+    ):
+        """
+        Args:
+            memory_config: Mem0 config to build a new `Memory` from.
+            memory: An existing `Memory` to share, e.g. between web sessions.
+                Takes precedence over `memory_config`.
+            user_id: Mem0 user whose memories these tools read and write.
+            writer: Background writer for `store_memory`. Writes are
+                synchronous when omitted.
+        """
+        self.memory = memory or cache_mem0_embedder(Memory.from_config(memory_config))
+        self.user_id = user_id
+        self.writer = writer
+
+    def _pending_memories(self, query: str = None) -> list[str]:
+        # Stored but not yet written by `writer`, so reads see our own writes.
+        if self.writer is None:
+            return []
+        pending = [m["content"] for m in self.writer.pending(self.user_id)]
+        if query is None:
+            return pending
+        terms = {t for t in query.lower().split() if len(t) > 2}
+        return [m for m in pending if terms & set(m.lower().split())]
 
     def store_memory(
         self,
         content: list[dict[str, str]],
-        user_id: str = "default_user",
+        user_id: str = None,
         infer: bool = False,
     ) -> str:
         """Store information in memory."""
         try:
-            self.memory.add(content, user_id=user_id, infer=infer)
+            if self.writer is not None:
+                self.writer.submit(
+                    content, user_id=user_id or self.user_id, infer=infer
+                )
+                return f"Queued memory: {content}"
+            self.memory.add(content, user_id=user_id or self.user_id, infer=infer)
             return f"Stored memory: {content}"
         except Exception as e:
             return f"Error storing memory: {str(e)}"
@@ -27,7 +69,6 @@ class MemoryTools:
     def search_memories(
         self,
         query: str,
-        # user_id: str = "default_user",
         limit: int = 5,
     ) -> str:
         """Search for long-term memories
@@ -38,32 +79,37 @@ class MemoryTools:
         try:
             results = self.memory.search(
                 query,
-                user_id="default_user",
+                user_id=self.user_id,
                 limit=limit,
             )
-            if not results:
+            memories = self._pending_memories(query)
+            memories += [
+                result["memory"] for result in (results or {}).get("results", [])
+            ]
+            if not memories:
                 return "No relevant memories found."
 
             memory_text = "Relevant memories found:\n"
-            for i, result in enumerate(results["results"]):
-                memory_text += f"{i}. {result['memory']}\n"
+            for i, memory in enumerate(memories[:limit]):
+                memory_text += f"{i}. {memory}\n"
             return memory_text
         except Exception as e:
             return f"Error searching memories: {str(e)}"
 
-    def get_all_memories(
-        self,
-        # user_id: str = "default_user",
-    ) -> str:
+    def get_all_memories(self) -> str:
         """Get all memories for a user."""
         try:
-            results = self.memory.get_all(user_id="default_user")
-            if not results:
+            results = self.memory.get_all(user_id=self.user_id)
+            memories = [
+                result["memory"] for result in (results or {}).get("results", [])
+            ]
+            memories += self._pending_memories()
+            if not memories:
                 return "No memories found for this user."
 
             memory_text = "All memories for user:\n"
-            for i, result in enumerate(results["results"]):
-                memory_text += f"{i}. {result['memory']}\n"
+            for i, memory in enumerate(memories):
+                memory_text += f"{i}. {memory}\n"
             return memory_text
         except Exception as e:
             return f"Error retrieving memories: {str(e)}"
@@ -90,29 +136,174 @@ def get_current_time() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
-class ConversationMemoryEntry(BaseModel):
-    model_config = ConfigDict(extra="forbid")
+class ConversationMemoryEntry(NamedTuple):
     role: str
     content: str
 
 
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def _render_entry(entry: ConversationMemoryEntry) -> str:
+    return json.dumps(
+        {"role": entry.role, "content": entry.content},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def clip_start(text: str, max_chars: int) -> str:
+    """The end of `text` within `max_chars`, starting on a line or sentence."""
+    if len(text) <= max_chars:
+        return text
+    tail = text[-max_chars:]
+    for boundary in ("\n", ". "):
+        cut = tail.find(boundary)
+        if cut != -1 and cut + len(boundary) < len(tail):
+            return tail[cut + len(boundary) :]
+    return tail
+
+
+def extractive_summary(
+    summary: str, entries: list[ConversationMemoryEntry], max_tokens: int
+) -> str:
+    """Fold `entries` into `summary` by clipping each turn and keeping the tail."""
+    lines = [summary] if summary else []
+    lines += [f"{e.role}: {e.content[:200]}" for e in entries]
+    return clip_start("\n".join(lines), max_tokens * 4)
+
+
 class ConversationMemory:
-    def __init__(self):
+    """Conversation history kept within a token budget.
+
+    A quarter of `token_budget` is reserved for `summary`; recent entries are
+    kept verbatim in the rest. Once they outgrow their share, the oldest ones
+    are folded into `summary` until the window is back under `low_watermark`
+    of its share. That slack means compaction runs every few turns, not on
+    every save. Folded entries are dropped, so `history` holds only the
+    window.
+
+    Folding first writes an `extractive_summary`, so `save` never waits on
+    the model. `summarizer` then runs on a worker thread, and its summary
+    replaces the extractive one on the next `save` or `history_str` if no
+    other fold happened meanwhile.
+
+    Each entry is rendered once, on `save`, as a compact JSON line kept in
+    `_lines` alongside `history`. The full history string is joined at most
+    once per change and reused until the next `save`.
+
+    Args:
+        token_budget: Estimated tokens the rendered history may use. `None`
+            keeps the full history, as before.
+        summarizer: `summarizer(previous_summary, entries) -> summary`, e.g. an
+            LLM call. The extractive summary stays if omitted or failing.
+        min_recent: Entries always kept verbatim, however long.
+        low_watermark: Fraction of its share the window shrinks to.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        summarizer: Optional[
+            Callable[[str, list[ConversationMemoryEntry]], str]
+        ] = None,
+        min_recent: int = 2,
+        low_watermark: float = 0.6,
+    ):
         self.history: list[ConversationMemoryEntry] = []
         self.summary: str = ""
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.min_recent = min_recent
+        self.low_watermark = low_watermark
+        # Entries folded into `summary` and dropped from `history`.
+        self.summarized = 0
+        self._lines: list[str] = []
+        self._tokens: list[int] = []
+        self._window_tokens = 0
+        self._summary_line = ""
+        self._rendered: Optional[str] = None
+        # (summarizer call, `summarized` when it was started)
+        self._summarizing: Optional[tuple[Future, int]] = None
 
     def history_str(self, left: int = 0, right: Optional[int] = None):
-        if right is None:
-            right = len(self.history)
-
-        return "\n".join(
-            [
-                i.model_dump_json(indent=4)
-                for i in self.history[left:right]
-                if not isinstance(i, dict)
-            ]
-        )
+        """The rendered history, or the entries `history[left:right]`.
+
+        Slice indices are into `history`, the window of recent entries;
+        entry `i` of the whole conversation is `history[i - summarized]`.
+        Only the full string includes the summary.
+        """
+        self._collect_summary()
+        if left == 0 and right is None:
+            if self._rendered is None:
+                lines = [self._summary_line] if self._summary_line else []
+                self._rendered = "\n".join(lines + self._lines)
+            return self._rendered
+        return "\n".join(self._lines[left:right])
 
     def save(self, role: str, content: str):
-        new_entry = ConversationMemoryEntry(role=role, content=content)
+        new_entry = ConversationMemoryEntry(role, content)
+        line = _render_entry(new_entry)
+        tokens = estimate_tokens(line)
         self.history.append(new_entry)
+        self._lines.append(line)
+        self._tokens.append(tokens)
+        self._window_tokens += tokens
+        self._rendered = None
+        self._collect_summary()
+
+        if self.token_budget is not None and self._window_tokens > self._window_budget:
+            self._compact()
+
+    @property
+    def _summary_budget(self) -> int:
+        return self.token_budget // 4
+
+    @property
+    def _window_budget(self) -> int:
+        return self.token_budget - self._summary_budget
+
+    def _compact(self):
+        target = self._window_budget * self.low_watermark
+        end = 0
+        last = len(self.history) - self.min_recent
+        while end < last and self._window_tokens > target:
+            self._window_tokens -= self._tokens[end]
+            end += 1
+        if end == 0:
+            return
+
+        folded = self.history[:end]
+        if self.summarizer is not None and self._summarizing is None:
+            context = contextvars.copy_context()
+            future = _summary_executor.submit(
+                context.run, self.summarizer, self.summary, folded
+            )
+            self._summarizing = (future, self.summarized + end)
+        self._set_summary(
+            extractive_summary(self.summary, folded, self._summary_budget)
+        )
+        del self.history[:end], self._lines[:end], self._tokens[:end]
+        self.summarized += end
+
+    def _collect_summary(self):
+        """Swap in a finished `summarizer` result for the extractive summary."""
+        if self._summarizing is None or not self._summarizing[0].done():
+            return
+        future, summarized = self._summarizing
+        self._summarizing = None
+        try:
+            summary = future.result()
+        except Exception:
+            log.exception("history summarizer failed, keeping the extractive summary")
+            return
+        # A later fold already replaced the extractive summary it was for.
+        if summary and summarized == self.summarized:
+            self._set_summary(clip_start(summary, self._summary_budget * 4))
+
+    def _set_summary(self, summary: str):
+        self.summary = summary
+        self._summary_line = _render_entry(ConversationMemoryEntry("summary", summary))
+        self._rendered = None
@@ -0,0 +1,274 @@
+"""Embedding cache shared by the Chroma retrievers and the mem0 memory.
+
+The same strings (course topics, memory searches, repeated questions) get
+embedded by Ollama over and over. `EmbeddingCache` keys vectors on
+``(model, normalized text)``. An in-memory LRU sits in front of an SQLite
+store, so hits survive restarts and are shared between processes. The store
+also keeps the running cost of the embeddings it computed, so the time saved
+by hits can be estimated in a process that has not embedded anything yet.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+from chromadb.api.types import Documents, Embeddings
+from chromadb.utils.embedding_functions.ollama_embedding_function import (
+    OllamaEmbeddingFunction,
+)
+
+from crec.config import config
+
+# mem0 embedders whose vectors depend on `memory_action`; VertexAI picks a
+# different task type for adding and searching memories.
+ACTION_DEPENDENT_PROVIDERS = frozenset({"vertexai"})
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU + SQLite cache of embeddings for one model.
+
+    Args:
+        model: Embedding model name, part of every key.
+        path: SQLite file for the on-disk store. Memory-only when `None`.
+        max_memory: Vectors kept in the in-memory LRU.
+
+    `_lock` guards the LRU and the counters and is never held across SQLite
+    I/O, which goes through `_db_lock`, so memory hits do not wait on disk.
+    """
+
+    def __init__(self, model: str, path: Optional[str] = None, max_memory: int = 4096):
+        self.model = model
+        self.max_memory = max_memory
+        self._lru: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = None
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, key)
+                )""")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS embedding_costs (
+                    model TEXT PRIMARY KEY,
+                    embeddings INTEGER NOT NULL,
+                    seconds REAL NOT NULL
+                )""")
+            self._conn.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.embed_seconds = 0.0
+
+    def embed(
+        self,
+        texts: Sequence[str],
+        embed_fn: Callable[[list[str]], Sequence[Sequence[float]]],
+    ) -> list[np.ndarray]:
+        """Return embeddings for `texts`, calling `embed_fn` once for the misses."""
+        keys = [_text_key(text) for text in texts]
+        vectors = self._lookup(keys)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Embed each distinct missing text once.
+            unique: dict[str, int] = {}
+            for i in missing:
+                unique.setdefault(keys[i], i)
+            start = time.perf_counter()
+            computed = embed_fn([texts[i] for i in unique.values()])
+            elapsed = time.perf_counter() - start
+
+            fresh = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(unique, computed)
+            }
+            self._store(fresh, elapsed)
+            for i in missing:
+                vectors[i] = fresh[keys[i]]
+            with self._lock:
+                self.misses += len(unique)
+                self.embed_seconds += elapsed
+        return vectors
+
+    def _lookup(self, keys: list[str]) -> list[Optional[np.ndarray]]:
+        vectors: list[Optional[np.ndarray]] = []
+        on_disk = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    self.memory_hits += 1
+                else:
+                    on_disk.append(i)
+                vectors.append(vector)
+
+        if on_disk and self._conn is not None:
+            wanted = list({keys[i] for i in on_disk})
+            placeholders = ",".join("?" * len(wanted))
+            with self._db_lock:
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                    [self.model, *wanted],
+                ).fetchall()
+            found = {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+            with self._lock:
+                for i in on_disk:
+                    vector = found.get(keys[i])
+                    if vector is not None:
+                        vectors[i] = vector
+                        self.disk_hits += 1
+                        self._remember(keys[i], vector)
+        return vectors
+
+    def _store(self, fresh: dict[str, np.ndarray], elapsed: float):
+        with self._lock:
+            for key, vector in fresh.items():
+                self._remember(key, vector)
+        if self._conn is None:
+            return
+        with self._db_lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+                [(self.model, key, vector.tobytes()) for key, vector in fresh.items()],
+            )
+            self._conn.execute(
+                "INSERT INTO embedding_costs (model, embeddings, seconds) "
+                "VALUES (?, ?, ?) ON CONFLICT (model) DO UPDATE SET "
+                "embeddings = embeddings + excluded.embeddings, "
+                "seconds = seconds + excluded.seconds",
+                (self.model, len(fresh), elapsed),
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_memory:
+            self._lru.popitem(last=False)
+
+    def _ms_per_embedding(self, misses: int, embed_seconds: float) -> float:
+        """Mean cost of one embedding: this process's, else the store's, else
+        `config.embedding_cost_ms`."""
+        if misses:
+            return embed_seconds * 1000 / misses
+        if self._conn is not None:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT embeddings, seconds FROM embedding_costs WHERE model = ?",
+                    (self.model,),
+                ).fetchone()
+            if row and row[0]:
+                return row[1] * 1000 / row[0]
+        return config.embedding_cost_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            memory_hits, disk_hits = self.memory_hits, self.disk_hits
+            misses, embed_seconds = self.misses, self.embed_seconds
+        hits = memory_hits + disk_hits
+        lookups = hits + misses
+        ms_per_embedding = self._ms_per_embedding(misses, embed_seconds)
+        return {
+            "memory_hits": memory_hits,
+            "disk_hits": disk_hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "embed_ms": embed_seconds * 1000,
+            "ms_per_embedding": ms_per_embedding,
+            "saved_ms": hits * ms_per_embedding,
+        }
+
+
+_caches: dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model: Optional[str] = None) -> EmbeddingCache:
+    """Return the process-wide cache for `model` (defaults to `config.embedding`)."""
+    model = model or config.embedding
+    with _caches_lock:
+        cache = _caches.get(model)
+        if cache is None:
+            cache = EmbeddingCache(
+                model,
+                path=config.embedding_cache,
+                max_memory=config.embedding_cache_size,
+            )
+            _caches[model] = cache
+        return cache
+
+
+class CachedOllamaEmbeddingFunction(OllamaEmbeddingFunction):
+    """`OllamaEmbeddingFunction` that goes through the shared `EmbeddingCache`.
+
+    It keeps the parent's `name()` and config, so collections created with
+    the plain Ollama function open with this one unchanged.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, **kwargs):
+        model_name = model_name or config.embedding
+        super().__init__(model_name=model_name, **kwargs)
+        self.cache = get_embedding_cache(model_name)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.cache.embed(list(input), super().__call__)
+
+
+def cache_mem0_embedder(memory, cache: Optional[EmbeddingCache] = None):
+    """Route a mem0 `Memory`'s embedder through `cache`.
+
+    Wraps `embed` and `embed_batch` on `memory.embedding_model` in place and
+    returns `memory`. Most providers ignore `memory_action`, so their vectors
+    share `cache` with the course retrievers. Providers in
+    `ACTION_DEPENDENT_PROVIDERS` get one cache per action instead.
+    """
+    embedder = memory.embedding_model
+    cache = cache or get_embedding_cache(embedder.config.model)
+    embed = embedder.embed
+    embed_batch = getattr(embedder, "embed_batch", None)
+    by_action = memory.config.embedder.provider in ACTION_DEPENDENT_PROVIDERS
+
+    def cache_for(memory_action) -> EmbeddingCache:
+        if not by_action:
+            return cache
+        return get_embedding_cache(f"{cache.model}:{memory_action}")
+
+    def cached_embed(text, memory_action=None):
+        return (
+            cache_for(memory_action)
+            .embed([text], lambda texts: [embed(texts[0], memory_action)])[0]
+            .tolist()
+        )
+
+    embedder.embed = cached_embed
+    if embed_batch is not None:
+
+        def cached_embed_batch(texts, memory_action="add"):
+            vectors = cache_for(memory_action).embed(
+                list(texts), lambda missing: embed_batch(missing, memory_action)
+            )
+            return [vector.tolist() for vector in vectors]
+
+        embedder.embed_batch = cached_embed_batch
+    return memory
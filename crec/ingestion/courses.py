@@ -1,16 +1,26 @@
+import functools
+import json
+import os
 import re
 import hashlib
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable
 from tqdm import tqdm
 from pathlib import Path
 
 from crec.config import config
-import chromadb
 from pypdf import PdfReader
-from chromadb.config import Settings
 from chromadb.utils.embedding_functions.ollama_embedding_function import (
     OllamaEmbeddingFunction,
 )
+from crec.ingestion.manifest import Manifest, file_hash
+from crec.ingestion.prerequisites import PREREQ_LABEL, parse_prerequisites
 from crec.ingestion.utils import sanitize_directory
+from crec.tools import chroma_handles
+from crec.tools.catalog_index import CatalogIndex
+from crec.tools.lexical_index import BM25Index
+from crec.tools.vector_index import NumpyVectorIndex
 
 #
 # logging.basicConfig(
@@ -22,97 +32,298 @@ from crec.ingestion.utils import sanitize_directory
 # log.setLevel(logging.INFO)
 
 
-def parse_course_descriptions(pdf_path):
-    """Extract and parse course information from PDF."""
+# Header, then the body: whole lines up to the next line that starts a record.
+# Unrolled so the body is consumed line by line instead of testing the
+# lookahead after every character.
+COURSE_PATTERN = re.compile(
+    r"([A-Z]+\s+\d{3})\s+([^\(]+)\((\d+)\s+credits?\)"
+    r"([^\n]*(?:\n(?![A-Z]+\s+\d{3}\s)[^\n]*)*)"
+)
+# Where one record may end and the next begin; COURSE_PATTERN's bodies stop here.
+RECORD_BOUNDARY = re.compile(r"\n(?=[A-Z]+\s+\d{3}\s+)")
+# The prerequisites paragraph of a record body; the description precedes it.
+PREREQ_PATTERN = re.compile(rf"{PREREQ_LABEL}\s*.+?(?=\n\n|\Z)", re.DOTALL)
+PAGES_PER_TASK = 16
 
-    # Extract text from PDF
-    reader = PdfReader(pdf_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
 
-    # Regex pattern to match course entries
-    pattern = (
-        r"([A-Z]+\s+\d{3})\s+([^\(]+)\((\d+)\s+credits?\)(.*?)(?=\n[A-Z]+\s+\d{3}\s+|$)"
-    )
+def _course_from_match(match: re.Match) -> dict:
+    full_text = match.group(4).strip()
+    # One scan of the body finds the prerequisites and where the description ends.
+    prereq = PREREQ_PATTERN.search(full_text)
+    if prereq:
+        description = full_text[: prereq.start()].strip()
+        prerequisites = prereq.group().strip()
+    else:
+        description, prerequisites = full_text, None
+
+    return {
+        "course_code": match.group(1).strip(),
+        "course_name": match.group(2).strip(),
+        "credits": match.group(3).strip(),
+        "description": description,
+        "prerequisites": prerequisites,
+    }
+
+
+@functools.lru_cache(maxsize=4)
+def _open_pdf(pdf_path: str, mtime: float) -> PdfReader:
+    # Each pool worker parses a bulletin's structure once, not once per chunk.
+    return PdfReader(pdf_path)
+
+
+def _extract_pages(pdf_path: str, start: int, stop: int) -> list[str]:
+    reader = _open_pdf(pdf_path, os.path.getmtime(pdf_path))
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def iter_page_texts(pdf_path: str, executor: Executor = None, prefetch: int = 8):
+    """Yield the text of each page of `pdf_path` in order.
+
+    With an `executor`, pages are extracted in chunks of `PAGES_PER_TASK` on
+    it, at most `prefetch` chunks ahead of the consumer.
+    """
+    if executor is None:
+        for page in PdfReader(pdf_path).pages:
+            yield page.extract_text()
+        return
 
-    courses = []
-    matches = re.finditer(pattern, text, re.DOTALL)
+    n_pages = len(PdfReader(pdf_path).pages)
+    chunks = iter(range(0, n_pages, PAGES_PER_TASK))
+    in_flight = deque()
+    for start in chunks:
+        stop = min(start + PAGES_PER_TASK, n_pages)
+        in_flight.append(executor.submit(_extract_pages, pdf_path, start, stop))
+        if len(in_flight) >= prefetch:
+            yield from in_flight.popleft().result()
+    while in_flight:
+        yield from in_flight.popleft().result()
 
-    for match in matches:
-        course_code = match.group(1).strip()
-        course_name = match.group(2).strip()
-        credits = match.group(3).strip()
-        full_text = match.group(4).strip()
 
-        # Extract prerequisites
-        prereq_pattern = (
-            r"((?:Prerequisite\(s\)|Pre/Co-requisite\(s\)):\s*.+?)(?=\n\n|\Z)"
+def iter_course_records(pages: Iterable[str]):
+    """Yield course records from page texts as soon as each one is complete.
+
+    A record is complete once the next record boundary has been seen, so
+    entries that continue onto the next page are held back until then. Only
+    the unfinished tail is kept between pages.
+    """
+    tail = ""
+    for page in pages:
+        buffer = tail + page + "\n"
+        cut = 0
+        for boundary in RECORD_BOUNDARY.finditer(buffer):
+            cut = boundary.start()
+        if cut:
+            for match in COURSE_PATTERN.finditer(buffer, 0, cut):
+                yield _course_from_match(match)
+            buffer = buffer[cut:]
+        tail = buffer
+    for match in COURSE_PATTERN.finditer(tail):
+        yield _course_from_match(match)
+
+
+def parse_course_descriptions(pdf_path, executor: Executor = None):
+    """Extract and parse course information from PDF."""
+    return list(iter_course_records(iter_page_texts(pdf_path, executor)))
+
+
+def parse_bulletins(pdf_paths: list[str], workers: int = None) -> dict[str, list[dict]]:
+    """Parse several bulletins at once, sharing one process pool for their pages."""
+    if not pdf_paths:
+        return {}
+    with (
+        ProcessPoolExecutor(max_workers=workers) as pages_pool,
+        ThreadPoolExecutor(max_workers=len(pdf_paths)) as files_pool,
+    ):
+        parsed = files_pool.map(
+            lambda path: parse_course_descriptions(path, pages_pool), pdf_paths
         )
-        prereq_match = re.search(prereq_pattern, full_text, re.DOTALL)
-        prerequisites = prereq_match.group(1).strip() if prereq_match else None
-
-        # Extract description (everything before prerequisites)
-        if prerequisites:
-            # Split on either format
-            desc_split = re.split(
-                r"(?:Prerequisite\(s\)|Pre/Co-requisite\(s\)):", full_text
+        return dict(zip(pdf_paths, parsed))
+
+
+def course_to_node(course: dict, file_name: str) -> dict:
+    """Build the retriever node stored in Chroma and the catalog index."""
+    text = str(course)
+    reqs = course.get("prerequisites")
+    return {
+        "node": {
+            "node_id": hashlib.md5(text.encode()).hexdigest(),
+            "text": text,
+            "metadata": {
+                "file_name": file_name,
+                "course_code": course.get("course_code"),
+                "course_name": course.get("course_name"),
+                "prerequisites": reqs if reqs else "None",
+                # Chroma metadata values are scalars, so the groups go as JSON.
+                "prerequisite_groups": json.dumps(parse_prerequisites(reqs)),
+            },
+        },
+        "score": 0.0,
+    }
+
+
+def add_nodes(collection, nodes: list[dict], embedding_function, batch_size: int):
+    """Embed and upsert `nodes` into `collection` in batches.
+
+    Each batch is embedded with one request and written with one
+    `collection.upsert`. The next batch is embedded on a worker thread while the
+    current one is written. Nodes whose id was already added (identical
+    course text) are skipped, since Chroma rejects duplicate ids in a batch.
+    """
+    seen = set()
+    batches = []
+    for node in nodes:
+        node_id = node["node"]["node_id"]
+        if node_id in seen:
+            continue
+        seen.add(node_id)
+        if not batches or len(batches[-1]) == batch_size:
+            batches.append([])
+        batches[-1].append(node)
+
+    def embed(batch):
+        return embedding_function([node["node"]["text"] for node in batch])
+
+    with ThreadPoolExecutor(max_workers=1) as executor, tqdm(total=len(seen)) as bar:
+        pending = executor.submit(embed, batches[0]) if batches else None
+        for i, batch in enumerate(batches):
+            embeddings = pending.result()
+            if i + 1 < len(batches):
+                pending = executor.submit(embed, batches[i + 1])
+            collection.upsert(
+                ids=[node["node"]["node_id"] for node in batch],
+                documents=[node["node"]["text"] for node in batch],
+                metadatas=[node["node"]["metadata"] for node in batch],
+                embeddings=embeddings,
             )
-            description = desc_split[0].strip()
-        else:
-            description = full_text.strip()
-
-        courses.append(
-            {
-                "course_code": course_code,
-                "course_name": course_name,
-                "credits": credits,
-                "description": description,
-                "prerequisites": prerequisites,
-            }
-        )
+            bar.update(len(batch))
 
-    return courses
 
+def _stored_nodes(collection, ids: list[str], batch_size: int = 1000) -> list[dict]:
+    """Rebuild the nodes of already-ingested records from Chroma."""
+    nodes = []
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        result = collection.get(ids=batch, include=["documents", "metadatas"])
+        by_id = dict(zip(result["ids"], zip(result["documents"], result["metadatas"])))
+        for node_id in batch:
+            if node_id in by_id:
+                text, metadata = by_id[node_id]
+                nodes.append(
+                    {
+                        "node": {
+                            "node_id": node_id,
+                            "text": text,
+                            "metadata": metadata,
+                        },
+                        "score": 0.0,
+                    }
+                )
+    return nodes
 
-def pipeline(folder: Path | str):
+
+def _sync_hnsw(collection) -> None:
+    """Apply the configured search ef, and flag build parameters that need `--full`."""
+    wanted = chroma_handles.hnsw_configuration()["hnsw"]
+    current = (collection.configuration or {}).get("hnsw") or {}
+    if current.get("ef_search") != wanted["ef_search"]:
+        collection.modify(configuration={"hnsw": {"ef_search": wanted["ef_search"]}})
+    stale = [
+        key
+        for key in ("space", "ef_construction", "max_neighbors")
+        if current.get(key) != wanted[key]
+    ]
+    if stale:
+        print(f"HNSW {', '.join(stale)} differ from config; rebuild with --full")
+
+
+def pipeline(folder: Path | str, full: bool = False):
+    """Ingest the course bulletins into Chroma and the catalog index.
+
+    Bulletins whose hash matches the manifest are skipped. For changed ones,
+    only courses whose text changed are embedded and stale ones deleted.
+    `full=True` drops the collection and rebuilds everything.
+    """
     paths = sanitize_directory(folder)
-    client = chromadb.PersistentClient(
-        path=config.chroma_path, settings=Settings(anonymized_telemetry=False)
-    )
+    bulletins = [p for p in paths if Path(p).name.startswith("ug_bulletin")]
+    client = chroma_handles.get_client(config.chroma_path)
+    manifest = Manifest(config.ingest_manifest)
 
-    for col in client.list_collections():
-        if col.name == config.courses_col:
+    exists = any(col.name == config.courses_col for col in client.list_collections())
+    if full or not exists:
+        if exists:
             # log.info("Courses collection exists. Deleting.")
             client.delete_collection(config.courses_col)
+        # Handles opened before the rebuild point at the deleted collection.
+        chroma_handles.invalidate(config.courses_col, config.chroma_path)
+        manifest.forget("courses")
+
+    embedding_function = OllamaEmbeddingFunction(
+        model_name=config.embedding,
+    )
     collection = client.get_or_create_collection(
         name=config.courses_col,
-        embedding_function=OllamaEmbeddingFunction(
-            model_name=config.embedding,
-        ),
+        embedding_function=embedding_function,
+        configuration=chroma_handles.hnsw_configuration(),
     )
-    for file_path in paths:
+    _sync_hnsw(collection)
+
+    digests = {path: file_hash(path) for path in bulletins}
+    to_parse = [
+        path
+        for path in bulletins
+        if not manifest.unchanged("courses", path, digests[path])
+    ]
+    for path in to_parse:
+        print(f"Reading file: {Path(path).name}")
+    parsed = parse_bulletins(to_parse, config.ingest_workers)
+
+    catalog_nodes = []
+    new_nodes = []
+    stale_ids = set()
+    changed = bool(to_parse)
+    for file_path in bulletins:
         file_name = Path(file_path).name
+        digest = digests[file_path]
 
-        if not file_name.startswith("ug_bulletin"):
+        if file_path not in parsed:
+            print(f"Unchanged, skipping: {file_name}")
+            ids = manifest.records("courses", file_path)
+            catalog_nodes.extend(_stored_nodes(collection, ids))
             continue
 
-        print(f"Reading file: {file_name}")
-
-        courses = parse_course_descriptions(file_path)
-        for course in tqdm(courses):
-            text = str(course)
-            id = hashlib.md5(text.encode()).hexdigest()
-            reqs = course.get("prerequisites")
-            collection.add(
-                ids=[id],
-                documents=[text],
-                metadatas=[
-                    {
-                        "file_name": file_name,
-                        "course_code": course.get("course_code"),
-                        "course_name": course.get("course_name"),
-                        "prerequisites": reqs if reqs else "None",
-                    }
-                ],
-            )
+        courses = parsed[file_path]
+        nodes = [course_to_node(course, file_name) for course in courses]
+        ids = list(dict.fromkeys(node["node"]["node_id"] for node in nodes))
+
+        previous = set(manifest.records("courses", file_path))
+        stale_ids.update(previous.difference(ids))
+        new_nodes.extend(n for n in nodes if n["node"]["node_id"] not in previous)
+        catalog_nodes.extend(nodes)
+        manifest.record("courses", file_path, digest, ids)
+
+    for file_name in manifest.removed("courses", bulletins):
+        print(f"Removed, deleting its courses: {file_name}")
+        changed = True
+        stale_ids.update(manifest.records("courses", file_name))
+        manifest.forget("courses", file_name)
+
+    # Identical courses in two bulletins share an id; keep those still listed.
+    live_ids = {
+        node_id
+        for entry in manifest.files("courses").values()
+        for node_id in entry["records"]
+    }
+    stale_ids -= live_ids
+    if stale_ids:
+        collection.delete(ids=list(stale_ids))
+    add_nodes(collection, new_nodes, embedding_function, config.ingest_batch_size)
+
+    # Side artifacts for course-code lookups and keyword search without Chroma.
+    artifacts = (config.catalog_index, config.lexical_index)
+    if changed or not all(Path(path).exists() for path in artifacts):
+        CatalogIndex(catalog_nodes).save(config.catalog_index)
+        BM25Index.build(catalog_nodes).save(config.lexical_index)
+    vectors = Path(f"{config.course_vectors}.json")
+    if config.course_vector_backend == "numpy" and (changed or not vectors.exists()):
+        NumpyVectorIndex.from_collection(collection).save(config.course_vectors)
+    manifest.save()
@@ -1,13 +1,16 @@
 # Used to create a dictionary out of known major names
+import functools
 import logging
-import json
-from queue import Queue
-from threading import Thread
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
 
 from langchain_text_splitters import HTMLSemanticPreservingSplitter
 
+from crec.config import config
+from crec.ingestion.manifest import Manifest, file_hash
 from crec.ingestion.utils import sanitize_directory
+from crec.tools.majors_store import MajorsStore
 
 logging.basicConfig(
     level=logging.INFO,
@@ -60,15 +63,17 @@ HEADER_4_FILTER = [
 ]
 
 
-# Reader worker: Parses HTMLs
-def reader_worker(html_paths: str, buffer: Queue):
-    HEADERS = [
-        ("h1", "Header 1"),
-        ("h2", "Header 2"),
-        ("h4", "Header 4"),
-    ]
+HEADERS = [
+    ("h1", "Header 1"),
+    ("h2", "Header 2"),
+    ("h4", "Header 4"),
+]
 
-    splitter = HTMLSemanticPreservingSplitter(
+
+@functools.cache
+def _splitter() -> HTMLSemanticPreservingSplitter:
+    # Built once per worker process.
+    return HTMLSemanticPreservingSplitter(
         headers_to_split_on=HEADERS,
         separators=["\n\n", "\n", ". ", "! ", "? "],
         max_chunk_size=1024,
@@ -76,102 +81,91 @@ def reader_worker(html_paths: str, buffer: Queue):
         elements_to_preserve=["table", "ul", "ol"],
         denylist_tags=["script", "style", "head"],
     )
-    for path in html_paths:
-        log.info(f"Reading {path}")
-
-        with open(path, "r", encoding="utf-8") as f:
-            splits = splitter.split_text(f)
-            transformed_splits = []
-
-            for split_doc in splits:
-                header_4 = split_doc.metadata.get("Header 4", "")
-
-                # Only include splits where Header 4 is in the filter set
-                if header_4 in HEADER_4_FILTER:
-                    transformed_splits.append(
-                        {
-                            "page_content": split_doc.page_content,
-                            "metadata": {
-                                "file_name": Path(path).name,
-                                **split_doc.metadata,
-                            },
-                        }
-                    )
-
-            # Only put in buffer if there are filtered splits
-            if transformed_splits:
-                buffer.put((path, transformed_splits))
-
-    buffer.put(None)
-    log.info("Done!")
-
-
-# Embedding worker: Embeds split HTMLs and writes to JSON
-def embed_worker(buffer: Queue, output_json_path: str = "majors.json"):
-    # Load existing JSON if it exists
-    # if os.path.exists(output_json_path):
-    #     with open(output_json_path, "r", encoding="utf-8") as f:
-    #         try:
-    #             json_data = json.load(f)
-    #         except json.JSONDecodeError:
-    #             json_data = {}
-    # else:
-    #     json_data = {}
-    json_data = {}
-
-    while True:
-        item = buffer.get()
-
-        if item is None:
-            log.info("Buffer Empty. Exiting.")
-            break
-
-        path, splits = item
-        log.info(f"Generating embeddings for {path}")
-
-        for split in splits:
-            text = split.get("page_content")
-            header_4 = split.get("metadata", {}).get("Header 4", "")
-
-            # Add to JSON with Header 4 as the key
-            if header_4 not in json_data:
-                json_data[header_4] = []
-
-            json_data[header_4].append(
-                {
-                    "text": text,
-                    "metadata": split.get("metadata"),
-                }
-            )
-
-        log.info(f"Finished embedding: {path}")
-
-    # Write the final JSON to file
-    with open(output_json_path, "w", encoding="utf-8") as f:
-        json.dump(json_data, f, indent=2, ensure_ascii=False)
-
-    log.info(f"JSON data written to {output_json_path}")
-
-
-# Main function
-def pipeline(folder: Path | str, output_json: str = "majors.json") -> None:
-    """Reader, writer pipeline using threading"""
 
-    paths = sanitize_directory(folder)
 
-    html_paths = [p for p in paths if p.endswith(".html")]
+def split_html(path: str) -> list[dict]:
+    """Split one major HTML page into chunks of the majors in `HEADER_4_FILTER`."""
+    with open(path, "r", encoding="utf-8") as f:
+        splits = _splitter().split_text(f)
 
-    buffer = Queue(maxsize=5)
+    # Only include splits where Header 4 is in the filter set
+    return [
+        {
+            "text": split_doc.page_content,
+            "metadata": {"file_name": Path(path).name, **split_doc.metadata},
+        }
+        for split_doc in splits
+        if split_doc.metadata.get("Header 4", "") in HEADER_4_FILTER
+    ]
 
-    output_json = Path(folder).joinpath(output_json)
 
-    reader_thread = Thread(target=reader_worker, args=(html_paths, buffer))
-    embed_thread = Thread(target=embed_worker, args=(buffer, output_json))
+def iter_splits(html_paths: list[str], executor: Executor = None, prefetch: int = 8):
+    """Yield `(path, chunks)` for each of `html_paths`, in order.
 
-    reader_thread.start()
-    embed_thread.start()
+    With an `executor`, files are split on it, at most `prefetch` files ahead
+    of the consumer, so finished files can be written while others are split.
+    """
+    if executor is None:
+        for path in html_paths:
+            yield path, split_html(path)
+        return
 
-    reader_thread.join()
-    embed_thread.join()
+    in_flight = deque()
+    for path in html_paths:
+        in_flight.append((path, executor.submit(split_html, path)))
+        if len(in_flight) >= prefetch:
+            path, future = in_flight.popleft()
+            yield path, future.result()
+    while in_flight:
+        path, future = in_flight.popleft()
+        yield path, future.result()
+
+
+def pipeline(folder: Path | str, full: bool = False, workers: int = None) -> None:
+    """Split the major HTML pages on a process pool into `config.majors_db`.
+
+    Each file's chunks are committed as soon as it is split, so memory stays
+    bounded by the files in flight and an interrupted run resumes where it
+    stopped. Only HTML files whose hash changed since the last run are split
+    again; `full=True` re-splits every file.
+    """
+
+    paths = sanitize_directory(folder)
+
+    html_paths = [p for p in paths if p.endswith(".html")]
 
-    log.info("Done!")
+    manifest = Manifest(config.ingest_manifest)
+    if full or not Path(config.majors_db).exists():
+        manifest.forget("majors")
+    store = MajorsStore(config.majors_db)
+    if full:
+        store.clear()
+    digests = {p: file_hash(p) for p in html_paths}
+    changed = [p for p in html_paths if not manifest.unchanged("majors", p, digests[p])]
+    names = {Path(p).name for p in html_paths}
+    removed = set(manifest.removed("majors", html_paths))
+    removed |= {name for name in store.file_names() if name not in names}
+    if not changed and not removed:
+        log.info("No major pages changed. Skipping.")
+        store.close()
+        return
+
+    # Files an interrupted run already wrote need not be split again.
+    to_split = [p for p in changed if store.digest(Path(p).name) != digests[p]]
+    log.info(f"Splitting {len(to_split)} of {len(changed)} changed major pages")
+
+    with (
+        store,
+        ProcessPoolExecutor(max_workers=workers or config.ingest_workers) as executor,
+    ):
+        for path, chunks in iter_splits(to_split, executor):
+            store.replace_file(Path(path).name, digests[path], chunks)
+            log.info(f"Stored {len(chunks)} chunks from {path}")
+        for path in changed:
+            manifest.record("majors", path, digests[path])
+        for file_name in removed:
+            store.remove_file(file_name)
+            manifest.forget("majors", file_name)
+    manifest.save()
+
+    log.info(f"Majors written to {config.majors_db}")
@@ -0,0 +1,73 @@
+"""Ingestion manifest: what each pipeline last ingested, by content hash.
+
+The pipelines record the sha256 of every source file they read and the ids
+of the records each file produced. On the next run, unchanged files are
+skipped, and only the records of changed or removed files are written or
+deleted.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def file_hash(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Per-pipeline ``{file name: {"hash": ..., "records": [...]}}`` entries.
+
+    Args:
+        path: JSON file the manifest is loaded from and saved to.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data: dict[str, dict] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._data = {}
+
+    def files(self, pipeline: str) -> dict[str, dict]:
+        return self._data.setdefault(pipeline, {})
+
+    def unchanged(self, pipeline: str, path: str | Path, digest: str) -> bool:
+        entry = self.files(pipeline).get(Path(path).name)
+        return entry is not None and entry["hash"] == digest
+
+    def records(self, pipeline: str, path: str | Path) -> list[str]:
+        entry = self.files(pipeline).get(Path(path).name)
+        return entry["records"] if entry else []
+
+    def record(
+        self, pipeline: str, path: str | Path, digest: str, records: list[str] = ()
+    ):
+        self.files(pipeline)[Path(path).name] = {
+            "hash": digest,
+            "records": list(records),
+        }
+
+    def removed(self, pipeline: str, paths: list[str]) -> list[str]:
+        """File names ingested before that are no longer among `paths`."""
+        present = {Path(p).name for p in paths}
+        return [name for name in self.files(pipeline) if name not in present]
+
+    def forget(self, pipeline: str, name: str | None = None):
+        """Drop one file's entry, or the whole pipeline's when `name` is None."""
+        if name is None:
+            self._data.pop(pipeline, None)
+        else:
+            self.files(pipeline).pop(name, None)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp_path, self.path)
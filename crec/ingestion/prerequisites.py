@@ -0,0 +1,43 @@
+"""Structured prerequisites parsed from the bulletin's free text.
+
+"Prerequisite(s): COMPSCI 201 and MATH 105 or 201; STATS 210" becomes
+``[["COMPSCI 201"], ["MATH 105", "MATH 201"], ["STATS 210"]]``: every inner
+list is an OR group, and all groups are required (AND).
+"""
+
+import re
+
+PREREQ_LABEL = r"(?:Prerequisite\(s\)|Pre/Co-requisite\(s\)):"
+
+_LABEL = re.compile(PREREQ_LABEL)
+_AND_SPLIT = re.compile(r";|\band\b", re.IGNORECASE)
+_OR = re.compile(r"\bor\b", re.IGNORECASE)
+# "COMPSCI 201", "MATH201", or a bare "201" that reuses the last subject.
+_CODE = re.compile(r"\b(?:([A-Z]{2,})\s*)?(\d{3})[A-Z]?\b")
+
+
+def parse_prerequisites(text: str | None) -> list[list[str]]:
+    """Return the prerequisite course codes of `text` as AND-of-OR groups.
+
+    Clauses that name no course (e.g. "instructor consent") are dropped.
+    """
+    if not text:
+        return []
+
+    groups = []
+    subject = None
+    for clause in _AND_SPLIT.split(_LABEL.sub("", text)):
+        # Without an "or", a comma list ("A, B") means all of them.
+        parts = [clause] if _OR.search(clause) else clause.split(",")
+        for part in parts:
+            codes = []
+            for match in _CODE.finditer(part):
+                subject = match.group(1) or subject
+                if subject is None:
+                    continue
+                code = f"{subject} {match.group(2)}"
+                if code not in codes:
+                    codes.append(code)
+            if codes and codes not in groups:
+                groups.append(codes)
+    return groups
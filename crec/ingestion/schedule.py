@@ -1,15 +1,26 @@
 import csv
+import re
 import sqlite3
 from pathlib import Path
+from typing import Optional
 
 from crec.config import config
+from crec.ingestion.manifest import Manifest, file_hash
 from crec.ingestion.utils import sanitize_directory
 
+TERM_PATTERN = re.compile(r"(spring|summer|fall|winter)(?:[\s_-]*(\d{4}))?")
+# Calendar order of the seasons within a year, for picking the latest term.
+SEASONS = ("winter", "spring", "summer", "fall")
+
 
 def init_db(DB_PATH):
     conn = sqlite3.connect(DB_PATH)
+    # WAL lets the retrievers' read-only connections keep reading while the
+    # schedule is reloaded. The setting is persistent for the file.
+    conn.execute("PRAGMA journal_mode=WAL;")
     c = conn.cursor()
 
+    # Superseded by the term-keyed `schedule` table below.
     c.execute(
         """
         DROP TABLE IF EXISTS spring_schedule;
@@ -18,8 +29,9 @@ def init_db(DB_PATH):
 
     c.execute(
         """
-    CREATE TABLE IF NOT EXISTS spring_schedule (
+    CREATE TABLE IF NOT EXISTS schedule (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
+        term TEXT NOT NULL,
         session TEXT NOT NULL,
         subject TEXT NOT NULL,
         catalog_num TEXT NOT NULL,
@@ -32,12 +44,93 @@ def init_db(DB_PATH):
     );
     """,
     )
+    c.execute(
+        """
+    DROP INDEX IF EXISTS idx_schedule_subject_catalog;
+    """
+    )
+    c.execute(
+        """
+    DROP INDEX IF EXISTS idx_schedule_session_subject;
+    """
+    )
+    # Every lookup filters on term, so it leads both indexes.
+    c.execute(
+        """
+    CREATE INDEX IF NOT EXISTS idx_schedule_term_subject_catalog
+    ON schedule (term, subject, catalog_num);
+    """
+    )
+    c.execute(
+        """
+    CREATE INDEX IF NOT EXISTS idx_schedule_term_session_subject
+    ON schedule (term, session, subject);
+    """
+    )
 
     conn.commit()
     conn.close()
 
 
-def load_csv_into_db(db_path: str, csv_path: str):
+def normalize_term(text: str) -> Optional[str]:
+    """Return the term named in `text`, e.g. "spring" or "fall_2026".
+
+    "Fall 2026", "fall-2026" and "Fall_2026 Schedule" all give "fall_2026".
+    Returns None if `text` names no season.
+    """
+    match = TERM_PATTERN.search(text.lower())
+    if match is None:
+        return None
+    return "_".join(part for part in match.groups() if part)
+
+
+def term_sort_key(term: str) -> tuple[int, int]:
+    """Order terms by year, then season; terms without a year sort first."""
+    season, _, year = term.partition("_")
+    rank = SEASONS.index(season) if season in SEASONS else -1
+    return (int(year) if year.isdigit() else 0, rank)
+
+
+def resolve_term(wanted: Optional[str], loaded: list[str]) -> Optional[str]:
+    """Pick the loaded term a configured term refers to.
+
+    An exact match wins. A season without a year ("spring") picks the latest
+    loaded term of that season, and None picks the latest loaded term.
+    """
+    if not loaded:
+        return None
+    if wanted is None:
+        return max(loaded, key=term_sort_key)
+    term = normalize_term(wanted) or wanted
+    if term in loaded:
+        return term
+    same_season = [t for t in loaded if t.partition("_")[0] == term]
+    if same_season:
+        return max(same_season, key=term_sort_key)
+    return None
+
+
+def term_from_path(csv_path: str) -> str:
+    """Return the term a schedule CSV belongs to, e.g. "spring" or "fall_2026".
+
+    Falls back to ``config.schedule_term`` when the file name names no term.
+    """
+    term = normalize_term(Path(csv_path).stem)
+    if term is not None:
+        return term
+    if config.schedule_term is None:
+        msg = f"{Path(csv_path).name} names no term and schedule_term is unset."
+        raise ValueError(msg)
+    return normalize_term(config.schedule_term) or config.schedule_term
+
+
+def load_csv_into_db(db_path: str, csv_path: str, term: Optional[str] = None):
+    """Replace ``term``'s sections with the rows of ``csv_path``.
+
+    Other terms in the database are left untouched. ``pipeline`` refuses two
+    CSVs of the same term, so one never overwrites the other.
+    """
+    term = term or term_from_path(csv_path)
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
 
@@ -46,6 +139,7 @@ def load_csv_into_db(db_path: str, csv_path: str):
 
         rows = [
             (
+                term,
                 row["Session"].strip(),
                 row["Subject"].strip(),
                 row["Catalog"].strip(),
@@ -59,9 +153,12 @@ def load_csv_into_db(db_path: str, csv_path: str):
             for row in reader
         ]
 
+    # Delete and insert in one transaction so readers never see the term empty.
+    cur.execute("DELETE FROM schedule WHERE term = ?;", (term,))
     cur.executemany(
         """
-        INSERT INTO spring_schedule (
+        INSERT INTO schedule (
+            term,
             session,
             subject,
             catalog_num,
@@ -72,22 +169,74 @@ def load_csv_into_db(db_path: str, csv_path: str):
             scheduled_days,
             credits
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
         """,
         rows,
     )
     conn.commit()
+    # Refresh planner statistics so lookups pick the composite indexes.
+    cur.execute("ANALYZE;")
+    conn.commit()
+    conn.close()
+
+
+def term_loaded(db_path: str, term: str) -> bool:
+    conn = sqlite3.connect(db_path)
+    row = conn.execute(
+        "SELECT 1 FROM schedule WHERE term = ? LIMIT 1;", (term,)
+    ).fetchone()
+    conn.close()
+    return row is not None
+
+
+def delete_term(db_path: str, term: str):
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM schedule WHERE term = ?;", (term,))
+    conn.commit()
     conn.close()
 
 
-def pipeline(data_dir: Path | str):
+def pipeline(data_dir: Path | str, full: bool = False):
+    """Load every schedule CSV into the database, one term per CSV.
+
+    CSVs whose hash matches the manifest are skipped, and the terms of CSVs
+    that were removed are deleted. `full=True` reloads every CSV.
+    """
     paths = sanitize_directory(data_dir)
-    csv_path = None
-    for path in paths:
-        if path.endswith(".csv"):
-            csv_path = path
-    if csv_path is None:
+    csv_paths = [path for path in paths if path.endswith(".csv")]
+    if not csv_paths:
         msg = "Schedule csv file was not found in data directory."
         raise LookupError(msg)
     init_db(config.schedule_db)
-    load_csv_into_db(config.schedule_db, csv_path)
+    manifest = Manifest(config.ingest_manifest)
+    if full:
+        manifest.forget("schedule")
+
+    terms: dict[str, str] = {}
+    for csv_path in csv_paths:
+        term = term_from_path(csv_path)
+        if term in terms:
+            msg = (
+                f"{Path(terms[term]).name} and {Path(csv_path).name} are both "
+                f"schedules for term {term!r}; rename one after its term."
+            )
+            raise ValueError(msg)
+        terms[term] = csv_path
+
+    for term, csv_path in terms.items():
+        digest = file_hash(csv_path)
+        if manifest.unchanged("schedule", csv_path, digest) and term_loaded(
+            config.schedule_db, term
+        ):
+            print(f"Unchanged, skipping: {Path(csv_path).name}")
+            continue
+        load_csv_into_db(config.schedule_db, csv_path, term)
+        manifest.record("schedule", csv_path, digest, [term])
+
+    live_terms = set(terms)
+    for file_name in manifest.removed("schedule", csv_paths):
+        for term in manifest.records("schedule", file_name):
+            if term not in live_terms:
+                delete_term(config.schedule_db, term)
+        manifest.forget("schedule", file_name)
+    manifest.save()
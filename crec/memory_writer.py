@@ -0,0 +1,206 @@
+"""Background, batched writes to the mem0 long-term memory.
+
+`Memory.add` embeds through Ollama and writes to Chroma, which used to run
+at the end of every `Agent.forward` after the last streamed chunk. The
+`MemoryWriter` takes those writes off the response path: turns go onto a
+bounded queue and a worker thread coalesces them into one `Memory.add` per
+user per batch. A batch that fails to write stays pending and is sent
+again with that user's next write.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from mem0 import Memory
+
+log = logging.getLogger(__file__)
+
+
+class MemoryWriter:
+    """Queue mem0 writes and apply them in batches on a worker thread.
+
+    Until a write lands, its messages are kept in a per-user overlay so
+    `pending()` can serve read-your-writes. Messages whose write failed
+    stay in the overlay and are retried with the user's next write.
+
+    Args:
+        memory: The mem0 `Memory` to write to.
+        max_queue: Queue capacity. `submit` blocks while it is full.
+        batch_size: Most queued writes coalesced into one batch.
+        batch_wait: Seconds the worker waits to fill a batch.
+        put_timeout: Seconds `submit` blocks on a full queue before writing
+            inline instead, so a stuck backend cannot drop memories.
+    """
+
+    def __init__(
+        self,
+        memory: Memory,
+        max_queue: int = 256,
+        batch_size: int = 16,
+        batch_wait: float = 0.2,
+        put_timeout: float = 5.0,
+    ):
+        self.memory = memory
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.put_timeout = put_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._pending: dict[str, list[dict]] = defaultdict(list)
+        self._retry: dict[tuple, list[dict]] = {}
+        self._lock = threading.Lock()
+        # Signalled when a submit finishes enqueueing; `close` waits on it so
+        # the stop sentinel is queued after every accepted item.
+        self._enqueued = threading.Condition(self._lock)
+        self._putting = 0
+        self._thread = None
+        self._closed = False
+        self.counters = {
+            "submitted": 0,
+            "written": 0,
+            "batches": 0,
+            "inline_writes": 0,
+            "failures": 0,
+            "write_seconds": 0.0,
+        }
+        atexit.register(self.close)
+
+    def submit(self, messages: list[dict], user_id: str, infer: bool = False):
+        """Queue `messages` for `user_id`, blocking while the queue is full."""
+        item = (user_id, list(messages), infer)
+        with self._lock:
+            self._pending[user_id].extend(messages)
+            self.counters["submitted"] += 1
+            closed = self._closed
+            if not closed:
+                self._putting += 1
+
+        if closed:
+            self._write([item])
+            return
+        try:
+            self._ensure_worker()
+            self._queue.put(item, timeout=self.put_timeout)
+            queued = True
+        except queue.Full:
+            queued = False
+        finally:
+            with self._lock:
+                self._putting -= 1
+                self._enqueued.notify_all()
+        if not queued:
+            with self._lock:
+                self.counters["inline_writes"] += 1
+            self._write([item])
+
+    def pending(self, user_id: str) -> list[dict]:
+        """Messages submitted for `user_id` that are not written yet."""
+        with self._lock:
+            return list(self._pending.get(user_id, ()))
+
+    def flush(self):
+        """Block until everything queued so far is written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Flush and stop the worker; later submits write inline."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._enqueued.wait_for(lambda: self._putting == 0)
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        with self._lock:
+            unwritten = sum(len(m) for m in self._retry.values())
+        if unwritten:
+            log.warning("Closing with %d unwritten memory messages", unwritten)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+        stats["queue_depth"] = self._queue.qsize()
+        batches = stats["batches"]
+        stats["mean_write_ms"] = (
+            stats["write_seconds"] / batches * 1000 if batches else 0.0
+        )
+        return stats
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="mem0-writer", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_wait
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: list[tuple]):
+        # One `Memory.add` per (user, infer) instead of one per turn.
+        grouped: dict[tuple, list[dict]] = defaultdict(list)
+        for user_id, messages, infer in batch:
+            grouped[(user_id, infer)].extend(messages)
+
+        for key, messages in grouped.items():
+            user_id, infer = key
+            with self._lock:
+                messages = self._retry.pop(key, []) + messages
+            start = time.perf_counter()
+            try:
+                self.memory.add(messages, user_id=user_id, infer=infer)
+                ok = True
+            except Exception:
+                log.exception(
+                    "Error storing %d memory messages for %s; will retry",
+                    len(messages),
+                    user_id,
+                )
+                ok = False
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.counters["batches"] += 1
+                self.counters["write_seconds"] += elapsed
+                if not ok:
+                    self.counters["failures"] += len(messages)
+                    self._retry[key] = messages + self._retry.get(key, [])
+                    continue
+                self.counters["written"] += len(messages)
+                written = {id(m) for m in messages}
+                pending = [
+                    m for m in self._pending.get(user_id, []) if id(m) not in written
+                ]
+                if pending:
+                    self._pending[user_id] = pending
+                else:
+                    self._pending.pop(user_id, None)
@@ -0,0 +1,197 @@
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import dspy
+from dspy.utils.exceptions import ContextWindowExceededError, format_error_for_lm
+from pydantic import BaseModel
+
+log = logging.getLogger(__file__)
+
+
+class ToolCall(BaseModel):
+    name: str
+    args: dict[str, Any] = {}
+
+
+class ParallelReAct(dspy.ReAct):
+    """ReAct variant that can issue several independent tool calls per step.
+
+    Each step the LM emits `next_tool_calls`, a list of tool calls that do not
+    depend on each other's results. They run concurrently on a bounded thread
+    pool (or with `asyncio.gather` in `aforward`), and their observations are
+    appended to the trajectory together.
+    """
+
+    def __init__(
+        self,
+        signature,
+        tools: list,
+        max_iters: int = 20,
+        max_workers: int = 4,
+    ):
+        """
+        Args:
+            signature: The signature of the module, as for `dspy.ReAct`.
+            tools: Functions, callables or `dspy.Tool` instances.
+            max_iters: The maximum number of reasoning steps.
+            max_workers: The maximum number of tool calls run at once.
+        """
+        super().__init__(signature, tools, max_iters)
+        self.max_workers = max_workers
+
+        signature = self.signature
+        inputs = ", ".join([f"`{k}`" for k in signature.input_fields.keys()])
+        outputs = ", ".join([f"`{k}`" for k in signature.output_fields.keys()])
+        instr = [f"{signature.instructions}\n"] if signature.instructions else []
+        instr.extend(
+            [
+                f"You are an Agent. In each episode, you will be given the fields {inputs} as input. And you can see your past trajectory so far.",
+                f"Your goal is to use one or more of the supplied tools to collect any necessary information for producing {outputs}.\n",
+                "To do this, you will interleave next_thought and next_tool_calls in each turn, and also when finishing the task.",
+                "next_tool_calls is a list of tool calls, each with a `name` and JSON `args`. Put every call that does not "
+                "need another call's result into the same list; they run at the same time.",
+                "After each turn, you receive the resulting observations, which get appended to your trajectory.\n",
+                "When writing next_thought, you may reason about the current situation and plan for future steps.",
+                "Each tool call's name must be one of:\n",
+            ]
+        )
+        for idx, tool in enumerate(self.tools.values()):
+            instr.append(f"({idx + 1}) {tool}")
+        instr.append(
+            "To finish, make `finish` the only call in next_tool_calls. "
+            "The value of next_tool_calls must be in JSON format."
+        )
+
+        react_signature = (
+            dspy.Signature({**signature.input_fields}, "\n".join(instr))
+            .append("trajectory", dspy.InputField(), type_=str)
+            .append("next_thought", dspy.OutputField(), type_=str)
+            .append("next_tool_calls", dspy.OutputField(), type_=list[ToolCall])
+        )
+        self.react = dspy.Predict(react_signature)
+
+    def _observe(self, call: ToolCall, result: Any) -> dict:
+        return {"tool": call.name, "args": call.args, "result": result}
+
+    def _run_tool(self, call: ToolCall) -> dict:
+        try:
+            return self._observe(call, self.tools[call.name](**call.args))
+        except Exception as err:
+            return self._observe(
+                call,
+                f"Execution error in {call.name}: {format_error_for_lm(err, traceback_frames=5)}",
+            )
+
+    async def _arun_tool(self, call: ToolCall, semaphore: asyncio.Semaphore) -> dict:
+        async with semaphore:
+            try:
+                return self._observe(
+                    call, await self.tools[call.name].acall(**call.args)
+                )
+            except Exception as err:
+                return self._observe(
+                    call,
+                    f"Execution error in {call.name}: {format_error_for_lm(err, traceback_frames=5)}",
+                )
+
+    def _run_tools(self, calls: list[ToolCall]) -> list[dict]:
+        if len(calls) == 1:
+            return [self._run_tool(calls[0])]
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(calls))
+        ) as executor:
+            # Each call gets its own copy of the context so dspy settings and
+            # tracing follow the tool into the worker thread.
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._run_tool, call)
+                for call in calls
+            ]
+            return [future.result() for future in futures]
+
+    def _record_step(self, trajectory: dict, idx: int, pred) -> list[ToolCall]:
+        calls = [c for c in pred.next_tool_calls if c.name != "finish"]
+        trajectory[f"thought_{idx}"] = pred.next_thought
+        trajectory[f"tool_calls_{idx}"] = [c.model_dump() for c in pred.next_tool_calls]
+        return calls
+
+    def _is_finished(self, pred) -> bool:
+        return not pred.next_tool_calls or any(
+            c.name == "finish" for c in pred.next_tool_calls
+        )
+
+    def forward(self, **input_args):
+        trajectory = {}
+        max_iters = input_args.pop("max_iters", self.max_iters)
+        for idx in range(max_iters):
+            try:
+                pred = self._call_with_potential_trajectory_truncation(
+                    self.react, trajectory, **input_args
+                )
+            except ContextWindowExceededError as err:
+                log.warning(f"Ending the trajectory: {format_error_for_lm(err)}")
+                break
+            except ValueError as err:
+                log.warning(
+                    f"Ending the trajectory: Agent failed to select valid tools: {format_error_for_lm(err)}"
+                )
+                break
+
+            calls = self._record_step(trajectory, idx, pred)
+            trajectory[f"observations_{idx}"] = self._run_tools(calls) if calls else []
+
+            if self._is_finished(pred):
+                break
+
+        extract = self._call_with_potential_trajectory_truncation(
+            self.extract, trajectory, **input_args
+        )
+        return dspy.Prediction(trajectory=trajectory, **extract)
+
+    async def aforward(self, **input_args):
+        trajectory = {}
+        max_iters = input_args.pop("max_iters", self.max_iters)
+        semaphore = asyncio.Semaphore(self.max_workers)
+        for idx in range(max_iters):
+            try:
+                pred = await self._async_call_with_potential_trajectory_truncation(
+                    self.react, trajectory, **input_args
+                )
+            except ContextWindowExceededError as err:
+                log.warning(f"Ending the trajectory: {format_error_for_lm(err)}")
+                break
+            except ValueError as err:
+                log.warning(
+                    f"Ending the trajectory: Agent failed to select valid tools: {format_error_for_lm(err)}"
+                )
+                break
+
+            calls = self._record_step(trajectory, idx, pred)
+            trajectory[f"observations_{idx}"] = list(
+                await asyncio.gather(*(self._arun_tool(c, semaphore) for c in calls))
+            )
+
+            if self._is_finished(pred):
+                break
+
+        extract = await self._async_call_with_potential_trajectory_truncation(
+            self.extract, trajectory, **input_args
+        )
+        return dspy.Prediction(trajectory=trajectory, **extract)
+
+    def truncate_trajectory(self, trajectory):
+        """Drop the oldest step, which here is three keys: thought, calls, observations."""
+        keys = list(trajectory.keys())
+        if len(keys) <= 3:
+            raise ContextWindowExceededError(
+                message="The trajectory is too long so your prompt exceeded the context window, but the trajectory "
+                "cannot be truncated because it only has one step."
+            )
+
+        for key in keys[:3]:
+            trajectory.pop(key)
+
+        return trajectory
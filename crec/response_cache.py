@@ -0,0 +1,235 @@
+"""Semantic cache of synthesized answers for repeated student questions.
+
+During registration many students ask nearly the same thing ("what CS
+courses are offered in session 1?"). `ResponseCache` stores the final
+answer under the query's embedding and returns it for later queries whose
+embedding is close enough. Every entry also records a fingerprint of the
+data it was answered from, and a changed fingerprint (a re-run ingestion
+pipeline) makes it stale. Embeddings barely move between "COMPSCI 201" and
+"COMPSCI 203", so a hit also needs the subjects, numbers and seasons the two
+queries name to match exactly. If the query cannot be embedded, the
+lookup is a miss and nothing is stored.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from crec.config import config
+from crec.embedding_cache import CachedOllamaEmbeddingFunction
+from crec.tools.memo import file_fingerprint
+from crec.tools.subject_resolver import SUBJECT_ALIASES, SUBJECTS
+
+log = logging.getLogger(__file__)
+
+# Queries about "my major", "courses I took", ... depend on who is asking.
+# "us" only in lower case, so "US History" is not personal.
+PERSONAL_PATTERN = re.compile(
+    r"\b(?i:i|me|my|mine|myself|i'm|im|i've|ive|i'd|i'll|we|our)\b|\bus\b"
+)
+KEY_TOKEN_PATTERN = re.compile(r"[a-z]+|\d+[a-z]?")
+SEASONS = frozenset(("spring", "summer", "fall", "winter"))
+# Single-word subject names, each mapped to its subject code.
+SUBJECT_WORDS = {
+    **{
+        alias.lower(): code
+        for alias, code in SUBJECT_ALIASES.items()
+        if " " not in alias
+    },
+    **{code.lower(): code for code in SUBJECTS},
+}
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def query_key(normalized: str) -> tuple[str, ...]:
+    """Subjects, numbers and seasons named in a normalized query, in order.
+
+    "cs 201 in session 1" gives ("COMPSCI", "201", "1"). Queries only share
+    an answer when their keys are equal.
+    """
+    key = []
+    for token in KEY_TOKEN_PATTERN.findall(normalized):
+        if token[0].isdigit() or token in SEASONS:
+            key.append(token)
+        elif token in SUBJECT_WORDS:
+            key.append(SUBJECT_WORDS[token])
+    return tuple(key)
+
+
+def data_fingerprint() -> tuple:
+    """Fingerprint of every store an answer can be built from."""
+    return file_fingerprint(
+        [
+            config.schedule_db,
+            config.majors_db,
+            config.catalog_index,
+            config.lexical_index,
+            config.course_vectors + ".npy",
+            config.course_vectors + ".json",
+            os.path.join(config.chroma_path, "chroma.sqlite3"),
+        ]
+    )
+
+
+class CachedResponse(NamedTuple):
+    query: str
+    key: tuple[str, ...]
+    vector: np.ndarray
+    fingerprint: tuple
+    response: str
+    created: float
+
+
+class CacheLookup(NamedTuple):
+    """Result of `ResponseCache.lookup`; pass it back to `store` on a miss.
+
+    `vector` is None when the query could not be embedded.
+    """
+
+    response: Optional[str]
+    query: str
+    key: tuple[str, ...]
+    vector: Optional[np.ndarray]
+    fingerprint: tuple
+
+
+class ResponseCache:
+    """LRU + TTL cache of answers, matched by cosine similarity of queries.
+
+    Args:
+        embed_fn: Embeds a list of texts. Defaults to the cached Ollama
+            embedding function.
+        threshold: Minimum cosine similarity for a hit.
+        ttl: Seconds an answer stays valid.
+        max_entries: Answers kept; the least recently used go first.
+        fingerprint_fn: Returns the current data fingerprint.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[list[str]], Sequence]] = None,
+        threshold: float = 0.95,
+        ttl: float = 3600,
+        max_entries: int = 512,
+        fingerprint_fn: Callable[[], tuple] = data_fingerprint,
+    ):
+        self._embed_fn = embed_fn
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.fingerprint_fn = fingerprint_fn
+        self._entries: OrderedDict[int, CachedResponse] = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0,
+            "embed_errors": 0,
+        }
+
+    @property
+    def embed_fn(self):
+        if self._embed_fn is None:
+            self._embed_fn = CachedOllamaEmbeddingFunction()
+        return self._embed_fn
+
+    def should_bypass(self, query: str, has_history: bool = False) -> bool:
+        """True when the answer may depend on who is asking.
+
+        Follow-ups within a conversation and first-person questions are
+        answered fresh; the bypass is counted in `stats()`.
+        """
+        bypass = has_history or bool(PERSONAL_PATTERN.search(query))
+        if bypass:
+            with self._lock:
+                self.counters["bypassed"] += 1
+        return bypass
+
+    def lookup(self, query: str) -> CacheLookup:
+        normalized = normalize_query(query)
+        key = query_key(normalized)
+        fingerprint = self.fingerprint_fn()
+        try:
+            vector = np.asarray(self.embed_fn([normalized])[0], dtype=np.float32)
+        except Exception:
+            log.exception("Could not embed query for the response cache")
+            with self._lock:
+                self.counters["embed_errors"] += 1
+                self.counters["misses"] += 1
+            return CacheLookup(None, normalized, key, None, fingerprint)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        now = time.monotonic()
+
+        with self._lock:
+            self._drop_stale(now, fingerprint)
+            best_id = None
+            candidates = [
+                (entry_id, entry)
+                for entry_id, entry in self._entries.items()
+                if entry.key == key
+            ]
+            if candidates:
+                scores = np.stack([e.vector for _, e in candidates]) @ vector
+                i = int(np.argmax(scores))
+                if scores[i] >= self.threshold:
+                    best_id = candidates[i][0]
+
+            if best_id is None:
+                self.counters["misses"] += 1
+                return CacheLookup(None, normalized, key, vector, fingerprint)
+            self._entries.move_to_end(best_id)
+            self.counters["hits"] += 1
+            return CacheLookup(
+                self._entries[best_id].response, normalized, key, vector, fingerprint
+            )
+
+    def store(self, lookup: CacheLookup, response: str):
+        """Cache `response` for the query `lookup` missed on."""
+        if not response or lookup.vector is None:
+            return
+        with self._lock:
+            self._entries[self._next_id] = CachedResponse(
+                lookup.query,
+                lookup.key,
+                lookup.vector,
+                lookup.fingerprint,
+                response,
+                time.monotonic(),
+            )
+            self._next_id += 1
+            self.counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def _drop_stale(self, now: float, fingerprint: tuple):
+        for entry_id, entry in list(self._entries.items()):
+            if entry.fingerprint != fingerprint or now - entry.created > self.ttl:
+                del self._entries[entry_id]
+                self.counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -1,3 +1,4 @@
+import argparse
 from pathlib import Path
 from crec.ingestion import courses, major_req_dict, schedule
 import logging
@@ -12,6 +13,14 @@ log = logging.getLogger(__file__)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rebuild every store instead of only re-ingesting changed files.",
+    )
+    args = parser.parse_args()
+
     logging.info("Setup process starting...")
     db_dir = Path(__file__).parent.parent.joinpath("dbs/")
     data_dir = Path(__file__).parent.parent.joinpath("data/")
@@ -19,11 +28,11 @@ if __name__ == "__main__":
     db_dir.mkdir(exist_ok=True)
 
     logging.info("Setting up courses...")
-    courses.pipeline(data_dir)
+    courses.pipeline(data_dir, full=args.full)
     logging.info("Finished setting up courses")
     logging.info("Setting up majors...")
-    major_req_dict.pipeline(data_dir)
+    major_req_dict.pipeline(data_dir, full=args.full)
     logging.info("Finished setting up majors")
     logging.info("Setting up schedules...")
-    schedule.pipeline(data_dir)
+    schedule.pipeline(data_dir, full=args.full)
     logging.info("Finished setting up schedules")
@@ -50,14 +50,13 @@ class Synthesizer(dspy.Module):
         super().__init__()
         self.synthesizer = dspy.ChainOfThought(SynthesizerSignature)
 
-    def forward(
+    def _synthesizer_args(
         self,
         current_user_message: str,
         conversation_memory: ConversationMemory,
         agent_reasoning: str,
         agent_output: str,
-        streaming: bool,
-    ):
+    ) -> dict:
         synthesizer_args = dict(
             current_user_message=current_user_message,
             conversation_history=conversation_memory.history_str(),
@@ -65,6 +64,19 @@ class Synthesizer(dspy.Module):
             agent_output=agent_output,
         )
         synthesizer_args["current_date"] = date.today()
+        return synthesizer_args
+
+    def forward(
+        self,
+        current_user_message: str,
+        conversation_memory: ConversationMemory,
+        agent_reasoning: str,
+        agent_output: str,
+        streaming: bool,
+    ):
+        synthesizer_args = self._synthesizer_args(
+            current_user_message, conversation_memory, agent_reasoning, agent_output
+        )
 
         if streaming:
             synthesizer_streamer = dspy.streamify(
@@ -80,3 +92,36 @@ class Synthesizer(dspy.Module):
         else:
             response = self.synthesizer(**synthesizer_args).response
             return dspy.Prediction(response=response)
+
+    async def aforward(
+        self,
+        current_user_message: str,
+        conversation_memory: ConversationMemory,
+        agent_reasoning: str,
+        agent_output: str,
+        streaming: bool,
+    ):
+        """Async counterpart of `forward`.
+
+        When streaming, `response` is an async generator over the same chunks
+        `forward` yields.
+        """
+        synthesizer_args = self._synthesizer_args(
+            current_user_message, conversation_memory, agent_reasoning, agent_output
+        )
+
+        if streaming:
+            synthesizer_streamer = dspy.streamify(
+                program=self.synthesizer,
+                stream_listeners=[
+                    dspy.streaming.StreamListener(signature_field_name="response")
+                ],
+                is_async_program=True,
+                async_streaming=True,
+            )
+            response_gen = synthesizer_streamer(**synthesizer_args)
+            return dspy.Prediction(response=response_gen)
+
+        else:
+            response = (await self.synthesizer.acall(**synthesizer_args)).response
+            return dspy.Prediction(response=response)
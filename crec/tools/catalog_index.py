@@ -0,0 +1,193 @@
+"""In-process course catalog index for exact and prefix course-code lookups.
+
+The courses pipeline writes the index next to the Chroma collection as a
+compact JSON artifact holding the same nodes Chroma returns. ``course_retriever``
+answers code and range queries (e.g. "COMPSCI 101", "COMPSCI 2xx",
+"MATH 200-299") and reverse prerequisite queries ("requiring COMPSCI 201")
+from it without touching the vector store.
+"""
+
+import bisect
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional
+
+from crec.config import config
+from crec.ingestion.prerequisites import parse_prerequisites
+
+# "COMPSCI 2xx", "COMPSCI 2**", "MATH 3" (prefix) or "MATH 200-299" (range)
+CATALOG_SCAN_PATTERN = re.compile(
+    r"^(?P<subject>[A-Z]+)\s+(?:(?P<prefix>\d{0,2})[X*]*|(?P<low>\d{3})\s*-\s*(?P<high>\d{3}))$",
+    re.IGNORECASE,
+)
+
+_lock = threading.Lock()
+_cached: tuple[Optional[float], Optional["CatalogIndex"]] = (None, None)
+
+
+def split_course_code(course_code: str) -> tuple[str, int]:
+    """Split "COMPSCI 101" into ("COMPSCI", 101)."""
+    subject, number = course_code.split()
+    return subject.upper(), int(number)
+
+
+def prerequisite_groups(node: dict) -> list[list[str]]:
+    """Return a node's prerequisites as AND-of-OR groups of course codes.
+
+    Nodes ingested before ``prerequisite_groups`` was stored are parsed from
+    their prerequisites text instead.
+    """
+    metadata = node["node"]["metadata"]
+    groups = metadata.get("prerequisite_groups")
+    if groups is not None:
+        return json.loads(groups)
+    text = metadata.get("prerequisites")
+    return parse_prerequisites(text if text != "None" else None)
+
+
+def normalize_name(name: str) -> str:
+    """Lower-cased words of a course name, e.g. "linear algebra i"."""
+    return " ".join(re.findall(r"\w+", name.lower()))
+
+
+class CatalogIndex:
+    """Code -> node map, per-subject sorted catalog numbers, course names and
+    the reverse prerequisite map (course -> courses that list it as a
+    prerequisite).
+
+    Args:
+        nodes: Retriever nodes (``{"node": {...}, "score": ...}``) whose
+            metadata carries ``course_code``. The first node per code wins,
+            matching what ``chroma_get_to_nodes`` returns.
+    """
+
+    def __init__(self, nodes: list[dict]):
+        self._by_code: dict[str, dict] = {}
+        self._by_subject: dict[str, list[int]] = {}
+        self._required_by: dict[str, list[str]] = {}
+        self._by_name: dict[str, list[str]] = {}
+
+        for node in nodes:
+            code = node["node"]["metadata"].get("course_code")
+            if not code or code in self._by_code:
+                continue
+            try:
+                subject, number = split_course_code(code)
+            except ValueError:
+                continue
+            self._by_code[code] = node
+            self._by_subject.setdefault(subject, []).append(number)
+            name = normalize_name(node["node"]["metadata"].get("course_name") or "")
+            if name:
+                self._by_name.setdefault(name, []).append(code)
+            for prereq in sorted(
+                {c for group in prerequisite_groups(node) for c in group}
+            ):
+                self._required_by.setdefault(prereq, []).append(code)
+
+        for numbers in self._by_subject.values():
+            numbers.sort()
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def __contains__(self, course_code: str) -> bool:
+        return course_code in self._by_code
+
+    def get(self, course_code: str) -> Optional[dict]:
+        """Return the node for an exact, normalized course code."""
+        return self._by_code.get(course_code)
+
+    def scan(self, subject: str, low: int, high: int, limit: int = 25) -> list[dict]:
+        """Return nodes for ``subject`` courses numbered ``low..high`` inclusive."""
+        subject = subject.upper()
+        numbers = self._by_subject.get(subject, [])
+        start = bisect.bisect_left(numbers, low)
+        end = bisect.bisect_right(numbers, high)
+        return [
+            self._by_code[f"{subject} {number}"]
+            for number in numbers[start:end][:limit]
+        ]
+
+    def requiring(self, course_code: str, limit: int = 25) -> list[dict]:
+        """Return nodes for courses that list ``course_code`` as a prerequisite,
+        either outright or as one of several alternatives."""
+        codes = self._required_by.get(course_code, [])
+        return [self._by_code[code] for code in codes[:limit]]
+
+    def named(self, name: str, limit: int = 25) -> list[dict]:
+        """Return nodes for courses whose name is exactly ``name``, ignoring
+        case and punctuation."""
+        codes = self._by_name.get(normalize_name(name), [])
+        return [self._by_code[code] for code in codes[:limit]]
+
+    def scan_query(self, query: str, limit: int = 25) -> Optional[list[dict]]:
+        """Answer a prefix/range query such as "COMPSCI 2xx" or "MATH 200-299".
+
+        Returns:
+            The matching nodes, or None if ``query`` is not a scan query over
+            a known subject.
+        """
+        match = CATALOG_SCAN_PATTERN.match(query.strip())
+        if not match:
+            return None
+
+        if match.group("subject").upper() not in self._by_subject:
+            return None
+
+        if match.group("low"):
+            low, high = int(match.group("low")), int(match.group("high"))
+        else:
+            prefix = match.group("prefix")
+            width = 3 - len(prefix)
+            low = int(prefix or 0) * 10**width
+            high = low + 10**width - 1
+        return self.scan(match.group("subject"), low, high, limit)
+
+    def save(self, path: str | Path) -> None:
+        """Write the index nodes to ``path`` atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                list(self._by_code.values()),
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CatalogIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+def get_catalog_index() -> Optional[CatalogIndex]:
+    """Return the process-wide catalog index, loading it on first use.
+
+    The file is reloaded when its mtime changes, so a rebuild by the ingestion
+    pipeline is picked up without a restart.
+
+    Returns:
+        The index, or None if ``config.catalog_index`` has not been built yet.
+    """
+    global _cached
+
+    try:
+        mtime = os.stat(config.catalog_index).st_mtime
+    except FileNotFoundError:
+        return None
+
+    cached_mtime, index = _cached
+    if cached_mtime == mtime:
+        return index
+
+    with _lock:
+        cached_mtime, index = _cached
+        if cached_mtime != mtime:
+            index = CatalogIndex.load(config.catalog_index)
+            _cached = (mtime, index)
+    return index
@@ -0,0 +1,139 @@
+"""Process-wide ChromaDB client and collection handles.
+
+Opening a collection means loading the SQLite catalogue and the HNSW segments
+from disk, so the tools share one handle per ``(chroma_path, collection)``
+instead of reopening it on every call. The ingestion pipelines call
+``invalidate`` after rebuilding a collection so the next lookup reopens it.
+"""
+
+import threading
+from typing import Callable, Optional, TypeVar
+
+import chromadb
+from chromadb.api import ClientAPI
+from chromadb.api.models.Collection import Collection
+from chromadb.config import Settings
+from chromadb.errors import NotFoundError
+
+from crec.config import config
+from crec.embedding_cache import CachedOllamaEmbeddingFunction
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_clients: dict[str, ClientAPI] = {}
+_collections: dict[tuple[str, str], Collection] = {}
+
+
+def _default_embedding_function():
+    return CachedOllamaEmbeddingFunction(model_name=config.embedding)
+
+
+def hnsw_configuration() -> dict:
+    """Collection configuration for the courses HNSW index from ``config``."""
+    return {
+        "hnsw": {
+            "space": config.courses_hnsw_space,
+            "ef_construction": config.courses_hnsw_ef_construction,
+            "max_neighbors": config.courses_hnsw_m,
+            "ef_search": config.courses_hnsw_ef_search,
+        }
+    }
+
+
+def _client_locked(path: str) -> ClientAPI:
+    client = _clients.get(path)
+    if client is None:
+        # Chroma refuses to open the same path twice with different settings,
+        # so every caller in the process goes through this one client.
+        client = chromadb.PersistentClient(
+            path=path, settings=Settings(anonymized_telemetry=False)
+        )
+        _clients[path] = client
+    return client
+
+
+def get_client(path: Optional[str] = None) -> ClientAPI:
+    """Return the shared ``PersistentClient`` for ``path``.
+
+    Args:
+        path: Chroma persistence directory. Defaults to ``config.chroma_path``.
+    """
+    path = path or config.chroma_path
+    with _lock:
+        return _client_locked(path)
+
+
+def get_collection(
+    name: Optional[str] = None,
+    path: Optional[str] = None,
+    embedding_function=None,
+) -> Collection:
+    """Return the shared handle for a collection, opening it on first use.
+
+    Args:
+        name: Collection name. Defaults to ``config.courses_col``.
+        path: Chroma persistence directory. Defaults to ``config.chroma_path``.
+        embedding_function: Embedding function used when the handle is first
+            opened. Defaults to Ollama with ``config.embedding``, behind the
+            shared embedding cache.
+
+    Returns:
+        Collection: A handle that is safe to share between threads.
+    """
+    path = path or config.chroma_path
+    name = name or config.courses_col
+    key = (path, name)
+
+    collection = _collections.get(key)
+    if collection is not None:
+        return collection
+
+    with _lock:
+        collection = _collections.get(key)
+        if collection is None:
+            collection = _client_locked(path).get_or_create_collection(
+                name=name,
+                embedding_function=embedding_function or _default_embedding_function(),
+            )
+            _collections[key] = collection
+    return collection
+
+
+def with_collection(
+    fn: Callable[[Collection], T],
+    name: Optional[str] = None,
+    path: Optional[str] = None,
+) -> T:
+    """Run ``fn`` against the shared collection handle.
+
+    If the collection was dropped and recreated behind our back (e.g. by
+    ``crec/setup.py`` running in another process) the cached handle points at a
+    deleted collection id. In that case the handle is invalidated and ``fn`` is
+    retried once with a freshly opened one.
+    """
+    path = path or config.chroma_path
+    name = name or config.courses_col
+    try:
+        return fn(get_collection(name, path))
+    except NotFoundError:
+        invalidate(name, path)
+        return fn(get_collection(name, path))
+
+
+def invalidate(name: Optional[str] = None, path: Optional[str] = None) -> None:
+    """Drop cached collection handles so the next lookup reopens them.
+
+    Args:
+        name: Only drop handles for this collection. Drops every collection
+            when both ``name`` and ``path`` are None.
+        path: Only drop handles under this persistence directory.
+    """
+    with _lock:
+        for key in list(_collections):
+            key_path, key_name = key
+            if name is not None and key_name != name:
+                continue
+            if path is not None and key_path != path:
+                continue
+            del _collections[key]
@@ -1,42 +1,212 @@
+import os
 import re
+from typing import Optional
 from crec.config import config
-import chromadb
-from chromadb.utils.embedding_functions.ollama_embedding_function import (
-    OllamaEmbeddingFunction,
-)
+from crec.tools.catalog_index import CatalogIndex, get_catalog_index
+from crec.tools.chroma_handles import with_collection
+from crec.tools.lexical_index import get_lexical_index
+from crec.tools.memo import memoize
+from crec.tools.vector_index import embed_queries, get_vector_index
 
+# Pattern to match course codes like "COMPSCI 101" or "BIO 111"
+COURSE_CODE_PATTERN = re.compile(r"^[A-Z]+\s+\d+$", re.IGNORECASE)
+# Reverse prerequisite queries like "requiring COMPSCI 201"
+REQUIRING_PATTERN = re.compile(r"^requiring\s+([A-Z]+\s+\d+)$", re.IGNORECASE)
 
-def chroma_result_to_nodes(result: dict) -> list[dict]:
-    ids = result["ids"][0]
-    texts = result["documents"][0]
-    metadatas = result["metadatas"][0]
-    scores = result["distances"][0]
 
+def chroma_result_to_nodes(result: dict) -> list[dict]:
+    """Convert a ``collection.query`` result into retriever nodes, query by query."""
     return [
         {
             "node": {
-                "node_id": ids[i],
-                "text": texts[i],
-                "metadata": metadatas[i],
+                "node_id": node_id,
+                "text": text,
+                "metadata": metadata,
             },
-            "score": float(scores[i]),
+            "score": float(score),
         }
-        for i in range(len(ids))
+        for ids, texts, metadatas, scores in zip(
+            result["ids"], result["documents"], result["metadatas"], result["distances"]
+        )
+        for node_id, text, metadata, score in zip(ids, texts, metadatas, scores)
     ]
 
 
+def query_vectors(query_texts: list[str], n_results: int) -> dict:
+    """Nearest courses to each text, from the configured vector backend.
+
+    ``config.course_vector_backend = "numpy"`` searches the exported
+    embeddings exactly in-process; otherwise, or before the export exists,
+    the Chroma collection is queried.
+    """
+    if config.course_vector_backend == "numpy":
+        index = get_vector_index()
+        if index is not None:
+            return index.query(embed_queries(query_texts), n_results)
+    return with_collection(
+        lambda collection: collection.query(
+            query_texts=query_texts,
+            n_results=n_results,
+        )
+    )
+
+
+def get_by_codes(course_codes: list[str]) -> dict:
+    """Records of `course_codes`, from the configured vector backend."""
+    if config.course_vector_backend == "numpy":
+        index = get_vector_index()
+        if index is not None:
+            return index.get({"course_code": course_codes})
+    return with_collection(
+        lambda collection: collection.get(
+            where={"course_code": {"$in": course_codes}},
+            include=["documents", "metadatas"],
+        )
+    )
+
+
+def chroma_get_to_nodes(
+    result: dict, course_codes: list[str], per_code: int = 1
+) -> list[dict]:
+    """Convert a metadata-only ``collection.get`` result into retriever nodes.
+
+    Keeps the first ``per_code`` records per course code, in the order the
+    codes were requested. Exact metadata matches have no distance, so they
+    score 0.0.
+    """
+    by_code: dict[str, list[dict]] = {}
+    for node_id, text, metadata in zip(
+        result["ids"], result["documents"], result["metadatas"]
+    ):
+        nodes = by_code.setdefault(metadata.get("course_code"), [])
+        if len(nodes) < per_code:
+            nodes.append(
+                {
+                    "node": {
+                        "node_id": node_id,
+                        "text": text,
+                        "metadata": metadata,
+                    },
+                    "score": 0.0,
+                }
+            )
+
+    return [node for code in course_codes for node in by_code.get(code, [])]
+
+
+# Candidates each ranking contributes to the fusion at least, and the
+# reciprocal rank fusion constant. Results per query come from config.
+FUSION_CANDIDATES = 10
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[str]], k: int
+) -> list[tuple[str, float]]:
+    """Fuse rankings of course codes, scoring each code sum(1 / (RRF_K + rank))."""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, code in enumerate(ranking, start=1):
+            scores[code] = scores.get(code, 0.0) + 1.0 / (RRF_K + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def _search_text(
+    text_queries: list[str], catalog: Optional[CatalogIndex]
+) -> list[dict]:
+    """Hybrid BM25 and vector search for free-text queries.
+
+    Each query's BM25 and vector rankings are fused with reciprocal rank
+    fusion, and every node is scored by it (higher is better), whichever
+    rankings were available. With `config.lexical_fast_path`, a query that is
+    exactly some course's name is answered with those courses without
+    embedding.
+    """
+    k = config.course_text_k
+    candidates = max(FUSION_CANDIDATES, k)
+    lexical = get_lexical_index() if catalog is not None else None
+
+    # A course name is looked up in the catalog, which is far cheaper than
+    # embedding, so it decides first which queries need the vector search.
+    titled = {}
+    if config.lexical_fast_path and catalog is not None:
+        titled = {query: catalog.named(query, k) for query in text_queries}
+    dense_queries = [query for query in text_queries if not titled.get(query)]
+    hits = {}
+    if lexical is not None:
+        hits = {query: lexical.search(query, candidates) for query in dense_queries}
+    dense = {}
+    if dense_queries:
+        chroma_result = query_vectors(dense_queries, candidates)
+        for i, query in enumerate(dense_queries):
+            # Nearest first; keep the best node per course code.
+            ranked = dense.setdefault(query, {})
+            for node_id, text, metadata in zip(
+                chroma_result["ids"][i],
+                chroma_result["documents"][i],
+                chroma_result["metadatas"][i],
+            ):
+                ranked.setdefault(
+                    metadata.get("course_code"),
+                    {"node_id": node_id, "text": text, "metadata": metadata},
+                )
+
+    result = []
+    for query in text_queries:
+        if titled.get(query):
+            codes = [node["node"]["metadata"]["course_code"] for node in titled[query]]
+            rankings = [codes]
+        else:
+            lexical_ranking = [hit.course_code for hit in hits.get(query, [])]
+            rankings = [lexical_ranking, list(dense[query])]
+        for code, score in reciprocal_rank_fusion(rankings, k):
+            node = dense.get(query, {}).get(code)
+            if node is None and catalog is not None and code in catalog:
+                node = catalog.get(code)["node"]
+            if node is not None:
+                result.append({"node": node, "score": score})
+    return result
+
+
+def normalize_course_code(course_code: str) -> str:
+    """Return ``course_code`` upper-cased with a single space, e.g. "COMPSCI 101"."""
+    return " ".join(course_code.split()).upper()
+
+
+@memoize(
+    sources=lambda: [
+        config.catalog_index,
+        config.lexical_index,
+        f"{config.course_vectors}.json",
+        os.path.join(config.chroma_path, "chroma.sqlite3"),
+    ],
+    settings=lambda: (
+        config.course_text_k,
+        config.course_code_k,
+        config.course_vector_backend,
+        config.lexical_fast_path,
+        config.embedding,
+    ),
+)
 def course_retriever(course_queries: list[str]) -> list[dict]:
     """
     Retrieve courses from ChromaDB using semantic search or metadata filtering.
 
     Automatically detects course code patterns (e.g., "COMPSCI 101", "BIO 111")
-    and applies metadata filtering for exact matches. Text-based queries use
-    semantic search via embeddings.
+    and answers them from the in-memory course catalog, falling back to a
+    single metadata ``get`` for codes the catalog does not know. Level and
+    range queries (e.g., "COMPSCI 2xx", "MATH 200-299") list every matching
+    course in the catalog, and "requiring COMPSCI 201" lists the courses that
+    have COMPSCI 201 as a prerequisite. Text-based queries are ranked by BM25
+    over the catalog and by one batched semantic search, fused with reciprocal
+    rank fusion and scored by it.
 
     Args:
         course_queries (list[str]): List of search queries. Can be course codes
-            in format "DEPT NNN" (e.g. "BEHAVSCI 102", "COMPSCI 101") or natural language
-            queries (e.g., "introduction to programming").
+            in format "DEPT NNN" (e.g. "BEHAVSCI 102", "COMPSCI 101"), course
+            levels or ranges (e.g. "COMPSCI 2xx", "MATH 200-299"), reverse
+            prerequisite queries (e.g. "requiring COMPSCI 201"), or natural
+            language queries (e.g., "introduction to programming").
 
     Returns:
         list[dict]: Query results from ChromaDB collection. Each result contains
@@ -50,50 +220,59 @@ def course_retriever(course_queries: list[str]) -> list[dict]:
         >>> course_retriever(["machine learning courses"])
         # Uses semantic search across course descriptions
 
+        >>> course_retriever(["COMPSCI 3xx"])
+        # Lists every 300-level COMPSCI course from the catalog
+
+        >>> course_retriever(["requiring COMPSCI 201"])
+        # Lists the courses with COMPSCI 201 among their prerequisites
+
         >>> course_retriever(["BIO 111", "introduction to chemistry"])
         # Combines metadata filtering for BIO 111 with semantic search
     """
-    client = chromadb.PersistentClient(path=config.chroma_path)
-    collection = client.get_or_create_collection(
-        name=config.courses_col,
-        embedding_function=OllamaEmbeddingFunction(
-            model_name=config.embedding,
-        ),
-    )
-
-    # Pattern to match course codes like "COMPSCI 101" or "BIO 111"
-    course_code_pattern = re.compile(r"^[A-Z]+\s+\d+$", re.IGNORECASE)
+    catalog = get_catalog_index()
 
-    # Separate queries into course codes and text queries
+    # Separate queries into course codes and text queries, answering whatever
+    # the catalog can directly.
     course_codes = []
     text_queries = []
+    result = []
+    # Codes already answered from the catalog or sent to Chroma; a repeated
+    # code adds nothing.
+    seen_codes = set()
 
     for query in course_queries:
-        if course_code_pattern.match(query.strip()):
-            course_codes.append(query.strip())
+        if COURSE_CODE_PATTERN.match(query.strip()):
+            code = normalize_course_code(query)
+            if code in seen_codes:
+                continue
+            seen_codes.add(code)
+            # The catalog holds one record per code; more come from Chroma.
+            node = catalog.get(code) if catalog and config.course_code_k == 1 else None
+            if node is not None:
+                result.append(node)
+            else:
+                course_codes.append(code)
+            continue
+
+        requiring = REQUIRING_PATTERN.match(query.strip())
+        if requiring and catalog:
+            result.extend(catalog.requiring(normalize_course_code(requiring.group(1))))
+            continue
+
+        scanned = catalog.scan_query(query) if catalog else None
+        if scanned is not None:
+            result.extend(scanned)
         else:
             text_queries.append(query)
-    print("course_codes", course_codes)
-    print("text", text_queries)
 
-    result = []
-    # If all queries are course codes, use metadata filtering
+    # Course codes missing from the catalog are an exact metadata match, so
+    # fetch them all in one round-trip without embedding anything.
     if course_codes:
-        for course_code in course_codes:
-            where_filter = {"course_code": course_code}
-
-            chroma_result = collection.query(
-                query_texts=course_code,
-                n_results=1,
-                where=where_filter,
-            )
-
-            result.extend(chroma_result_to_nodes(chroma_result))
+        chroma_result = get_by_codes(course_codes)
+        result.extend(
+            chroma_get_to_nodes(chroma_result, course_codes, config.course_code_k)
+        )
 
     if text_queries:
-        chroma_result = collection.query(
-            query_texts=text_queries,
-            n_results=3,
-        )
-        result.extend(chroma_result_to_nodes(chroma_result))
+        result.extend(_search_text(text_queries, catalog))
     return result
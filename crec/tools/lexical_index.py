@@ -0,0 +1,172 @@
+"""BM25 inverted index over the course catalog for keyword queries.
+
+The courses pipeline builds it from the catalog nodes and writes it next to
+the catalog index. Each course is indexed on its code, name, description and
+prerequisites. ``course_retriever`` fuses its ranking with the vector search.
+"""
+
+import ast
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from crec.config import config
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a about an and are as at be by course courses for from in into "
+    "is of on or over the to with".split()
+)
+INDEXED_FIELDS = ("course_code", "course_name", "description", "prerequisites")
+
+_lock = threading.Lock()
+_cached: tuple[Optional[float], Optional["BM25Index"]] = (None, None)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def course_text(node: dict) -> str:
+    """The indexed fields of a course node, whose text is ``str(course)``."""
+    text = node["node"]["text"]
+    try:
+        course = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+    return " ".join(course.get(field) or "" for field in INDEXED_FIELDS)
+
+
+class LexicalHit(NamedTuple):
+    course_code: str
+    score: float
+    # Share of the distinct query terms found in the course.
+    coverage: float
+
+
+class BM25Index:
+    """Okapi BM25 over one document per course code.
+
+    Args:
+        codes: Course code of each document.
+        lengths: Token count of each document.
+        postings: ``{term: [doc, tf, doc, tf, ...]}``.
+    """
+
+    def __init__(
+        self,
+        codes: list[str],
+        lengths: list[int],
+        postings: dict[str, list[int]],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.codes = codes
+        self.lengths = lengths
+        self.postings = postings
+        n = len(codes)
+        avg = sum(lengths) / n if n else 1.0
+        self._idf = {
+            term: math.log(1 + (n - len(p) / 2 + 0.5) / (len(p) / 2 + 0.5))
+            for term, p in postings.items()
+        }
+        # BM25's length normalization, per document.
+        self._norm = [k1 * (1 - b + b * length / avg) for length in lengths]
+        self.k1 = k1
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @classmethod
+    def build(cls, nodes: list[dict]) -> "BM25Index":
+        """Index `nodes`, keeping the first node per course code like the catalog."""
+        codes, lengths, postings = [], [], {}
+        seen = set()
+        for node in nodes:
+            code = node["node"]["metadata"].get("course_code")
+            if not code or code in seen:
+                continue
+            seen.add(code)
+            tokens = tokenize(course_text(node))
+            doc = len(codes)
+            codes.append(code)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).extend((doc, tf))
+        return cls(codes, lengths, postings)
+
+    def search(self, query: str, k: int = 10) -> list[LexicalHit]:
+        """Return the `k` best matching courses for `query`, best first."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        scores: dict[int, float] = {}
+        matched: Counter = Counter()
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            idf = self._idf[term]
+            for i in range(0, len(posting), 2):
+                doc, tf = posting[i], posting[i + 1]
+                score = idf * tf * (self.k1 + 1) / (tf + self._norm[doc])
+                scores[doc] = scores.get(doc, 0.0) + score
+                matched[doc] += 1
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [
+            LexicalHit(self.codes[doc], score, matched[doc] / len(terms))
+            for doc, score in best
+        ]
+
+    def save(self, path: str | Path) -> None:
+        """Write the index to ``path`` atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "codes": self.codes,
+                    "lengths": self.lengths,
+                    "postings": self.postings,
+                },
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["codes"], data["lengths"], data["postings"])
+
+
+def get_lexical_index() -> Optional[BM25Index]:
+    """Return the process-wide BM25 index, reloaded when its file changes.
+
+    Returns:
+        The index, or None if ``config.lexical_index`` has not been built yet.
+    """
+    global _cached
+
+    try:
+        mtime = os.stat(config.lexical_index).st_mtime
+    except FileNotFoundError:
+        return None
+
+    cached_mtime, index = _cached
+    if cached_mtime == mtime:
+        return index
+
+    with _lock:
+        cached_mtime, index = _cached
+        if cached_mtime != mtime:
+            index = BM25Index.load(config.lexical_index)
+            _cached = (mtime, index)
+    return index
@@ -1,16 +1,125 @@
-import json
-from pathlib import Path
-from thefuzz import fuzz, process
+import os
+import threading
+from collections import Counter
+from typing import Optional
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
 from crec.config import config
+from crec.tools.majors_store import CHUNKS_SQL, MAJORS_SQL, chunk_from_row
+from crec.tools.memo import file_fingerprint, memoize
+from crec.tools.sqlite_pool import get_connections
 
+_lock = threading.Lock()
+_cached: tuple = (None, None, None)  # (path, fingerprint, _MajorsIndex)
 
+# Abbreviations students use for programs and tracks, expanded word by word
+# before matching. Curated rather than derived from the names, since
+# generated acronyms collide ("cs" is also "Cultures and Societies").
+ABBREVIATIONS = {
+    "amcs": "applied mathematics and computational sciences",
+    "cs": "computer science",
+    "compsci": "computer science",
+    "econ": "economics",
+    "envsci": "environmental science",
+    "math": "mathematics",
+    "neuro": "neuroscience",
+    "polisci": "political science",
+    "ppe": "philosophy politics and economics",
+    "qpe": "quantitative political economy",
+}
+
+
+class _MajorsIndex:
+    """Major names in the majors store plus the lookup tables derived from them.
+
+    Exact names and aliases resolve through ``exact``. Everything else is
+    fuzzy matched against the names preprocessed once here rather than on
+    every call. Chunks stay in the store until a major is matched.
+    """
+
+    def __init__(self, names: list[str]):
+        self.names = names
+        self.processed = [default_process(name) for name in self.names]
+        self.exact: dict[str, str] = {}
+
+        for name, processed in zip(self.names, self.processed):
+            self.exact.setdefault(processed, name)
+        # An alias several majors share ("computer science", "public policy")
+        # names none of them, so it is left to fuzzy matching.
+        aliases = {name: _aliases(name) for name in self.names}
+        counts = Counter(alias for values in aliases.values() for alias in set(values))
+        for name, values in aliases.items():
+            for alias in values:
+                if counts[alias] == 1:
+                    self.exact.setdefault(alias, name)
+
+    def match(self, major_query: str) -> Optional[str]:
+        query = " ".join(
+            ABBREVIATIONS.get(word, word)
+            for word in default_process(major_query).split()
+        )
+        name = self.exact.get(query)
+        if name is not None:
+            return name
+
+        best = process.extractOne(
+            query,
+            self.processed,
+            scorer=fuzz.token_set_ratio,
+            processor=None,
+        )
+        if best is None:
+            return None
+        return self.names[best[2]]
+
+
+def _aliases(name: str) -> list[str]:
+    """Return the lookup aliases for a major name.
+
+    "Philosophy, Politics, and Economics / Public Policy" yields each side of
+    the slash ("philosophy politics and economics", "public policy").
+    """
+    parts = [default_process(part) for part in name.split("/")]
+    return [part for part in parts if part]
+
+
+def _load_majors_index() -> _MajorsIndex:
+    """Return the cached index, re-reading the major names when the store changes."""
+    global _cached
+
+    path = config.majors_db
+    if not os.path.exists(path):
+        msg = f"Majors store does not exist at {path}"
+        raise LookupError(msg)
+    # Writes land in the -wal file first, so it is part of the fingerprint.
+    fingerprint = file_fingerprint([path])
+
+    cached_path, cached_fingerprint, index = _cached
+    if cached_path == path and cached_fingerprint == fingerprint:
+        return index
+
+    with _lock:
+        cached_path, cached_fingerprint, index = _cached
+        if cached_path != path or cached_fingerprint != fingerprint:
+            rows = get_connections(path).execute(MAJORS_SQL)
+            index = _MajorsIndex([major for (major,) in rows])
+            _cached = (path, fingerprint, index)
+    return index
+
+
+def _major_chunks(major: str) -> list[dict]:
+    rows = get_connections(config.majors_db).execute(CHUNKS_SQL, (major,))
+    return [chunk_from_row(text, metadata) for text, metadata in rows]
+
+
+@memoize(sources=lambda: [config.majors_db])
 def major_retriever(
     major_queries: list[str],
 ) -> list[dict]:
     """Retrieve top matching major requirements based on fuzzy string matching.
 
-    Searches through a JSON document containing major information and
-    returns the top matches using token-based fuzzy matching.
+    Matches each query against the major names in the majors store using
+    token-based fuzzy matching, then reads only the matched majors' chunks.
 
     Args:
         major_queries list[str]: The list of search query string representing
@@ -22,27 +131,12 @@ def major_retriever(
             - 'metadata': Dict with major name and file_name
     """
 
-    result = []
-
-    if not Path(config.majors_doc).exists():
-        msg = f"Majors document does not exist at {config.majors_doc}"
-        raise LookupError(msg)
-
-    with open(config.majors_doc, "r", encoding="utf-8") as f:
-        try:
-            majors = json.load(f)
-        except json.JSONDecodeError:
-            raise json.JSONDecodeError
+    index = _load_majors_index()
 
+    result = []
     for major_query in major_queries:
-        matches = process.extract(
-            major_query,
-            majors.keys(),
-            scorer=fuzz.token_set_ratio,
-            limit=1,
-        )
-
-        for match in matches:
-            result.append(majors.get(match[0]))
+        match = index.match(major_query)
+        if match is not None:
+            result.append(_major_chunks(match))
 
     return result
@@ -0,0 +1,110 @@
+"""SQLite store of major requirement chunks, keyed by major (Header 4).
+
+The majors pipeline writes each HTML file's chunks in one transaction as
+soon as the file is split, together with the file's hash. A run that dies
+halfway therefore keeps every finished file, and the next run only splits
+the rest. ``major_retriever`` reads the major names once and then only the
+chunks of the majors it matched, through ``MAJORS_SQL`` and ``CHUNKS_SQL``.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+# Major names, in the order their first chunk was written.
+MAJORS_SQL = "SELECT major FROM chunks GROUP BY major ORDER BY MIN(id);"
+CHUNKS_SQL = "SELECT text, metadata FROM chunks WHERE major = ? ORDER BY id;"
+
+
+def chunk_from_row(text: str, metadata: str) -> dict:
+    return {"text": text, "metadata": json.loads(metadata)}
+
+
+class MajorsStore:
+    """Chunks of every major, with the source files they came from.
+
+    Args:
+        path: SQLite database file, created if missing.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        # WAL so readers keep reading while a file's chunks are replaced.
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                file_name TEXT PRIMARY KEY,
+                digest TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                major TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_major ON chunks (major);
+            CREATE INDEX IF NOT EXISTS idx_chunks_file ON chunks (file_name);
+            """
+        )
+        self.conn.commit()
+
+    def __enter__(self) -> "MajorsStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def file_names(self) -> list[str]:
+        return [name for (name,) in self.conn.execute("SELECT file_name FROM files;")]
+
+    def digest(self, file_name: str) -> str | None:
+        """Hash of `file_name` when its chunks were last written, if ever."""
+        row = self.conn.execute(
+            "SELECT digest FROM files WHERE file_name = ?;", (file_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def replace_file(self, file_name: str, digest: str, chunks: list[dict]):
+        """Swap the chunks of `file_name` for `chunks` in one transaction."""
+        with self.conn:
+            self.conn.execute("DELETE FROM chunks WHERE file_name = ?;", (file_name,))
+            self.conn.executemany(
+                "INSERT INTO chunks (major, file_name, text, metadata) "
+                "VALUES (?, ?, ?, ?);",
+                [
+                    (
+                        chunk["metadata"].get("Header 4", ""),
+                        file_name,
+                        chunk["text"],
+                        json.dumps(chunk["metadata"], ensure_ascii=False),
+                    )
+                    for chunk in chunks
+                ],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (file_name, digest) VALUES (?, ?);",
+                (file_name, digest),
+            )
+
+    def remove_file(self, file_name: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM chunks WHERE file_name = ?;", (file_name,))
+            self.conn.execute("DELETE FROM files WHERE file_name = ?;", (file_name,))
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM chunks;")
+            self.conn.execute("DELETE FROM files;")
+
+    def majors(self) -> list[str]:
+        return [major for (major,) in self.conn.execute(MAJORS_SQL)]
+
+    def chunks(self, major: str) -> list[dict]:
+        rows = self.conn.execute(CHUNKS_SQL, (major,))
+        return [chunk_from_row(text, metadata) for text, metadata in rows]
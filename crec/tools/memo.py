@@ -0,0 +1,248 @@
+"""Memoization for the retriever tools.
+
+Within one ReAct loop the agent often repeats a tool call with the same or
+reordered arguments, and across turns it re-fetches the same majors and
+courses. ``memoize`` caches tool results on normalized arguments at two
+levels:
+
+* a per-conversation LRU ``MemoScope``, activated with ``memo_scope`` around
+  a turn (the Agent keeps one per conversation), and
+* a process-wide LRU shared by every conversation.
+
+Every entry carries a fingerprint of the files the tool reads from. When an
+ingestion pipeline rebuilds a store, the fingerprint changes and old entries
+miss. Config values that change a tool's results are part of the key.
+Callers get a deep copy of the cached result, so mutating one cannot
+corrupt later hits.
+"""
+
+import copy
+import functools
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable, Optional
+
+_MISSING = object()
+
+
+def file_fingerprint(paths: Iterable[str]) -> tuple:
+    """(mtime, size) of each path and its SQLite ``-wal`` file, ``None`` if absent."""
+    fingerprint = []
+    for path in paths:
+        for candidate in (path, path + "-wal"):
+            try:
+                stat = os.stat(candidate)
+                fingerprint.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+def normalize_arg(value: Any) -> Any:
+    """Hashable form of a tool argument, ignoring case and spacing in strings.
+
+    Lists keep their order, since tools may return results in it; only sets
+    are sorted.
+    """
+    if isinstance(value, str):
+        return " ".join(value.casefold().split())
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_arg(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted({normalize_arg(v) for v in value}, key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted((k, normalize_arg(v)) for k, v in value.items()))
+    return value
+
+
+class MemoScope:
+    """Results cached for one conversation, with per-scope hit counters.
+
+    ParallelReAct runs a turn's tool calls on worker threads, so every access
+    goes through `lock`.
+
+    Args:
+        maxsize: Entries kept; the least recently used go first.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple, fingerprint: tuple):
+        """Return the entry for `key` if its fingerprint is current, counting a hit."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != fingerprint:
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry: tuple, hit: bool):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+            }
+
+
+_scope: ContextVar[Optional[MemoScope]] = ContextVar("crec_memo_scope", default=None)
+
+
+@contextmanager
+def memo_scope(scope: MemoScope):
+    """Make `scope` the conversation scope for tool calls in this context."""
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+class _Memoized:
+    def __init__(
+        self,
+        fn: Callable,
+        sources: Callable[[], list[str]],
+        settings: Callable[[], tuple],
+        maxsize: int,
+    ):
+        self.fn = fn
+        self.sources = sources
+        self.settings = settings
+        self.maxsize = maxsize
+        self.signature = inspect.signature(fn)
+        self.cache: OrderedDict[tuple, tuple] = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"scope_hits": 0, "global_hits": 0, "misses": 0, "stale": 0}
+
+    def key(self, args, kwargs) -> tuple:
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return (
+            self.fn.__qualname__,
+            tuple((k, normalize_arg(v)) for k, v in bound.arguments.items()),
+            tuple(self.settings()),
+        )
+
+    def __call__(self, *args, **kwargs):
+        key = self.key(args, kwargs)
+        fingerprint = file_fingerprint(self.sources())
+        scope = _scope.get()
+
+        result = self._lookup(key, fingerprint, scope)
+        if result is not _MISSING:
+            return copy.deepcopy(result)
+
+        result = self.fn(*args, **kwargs)
+        entry = (fingerprint, result)
+        with self.lock:
+            self.counters["misses"] += 1
+            self.cache[key] = entry
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        if scope is not None:
+            scope.put(key, entry, hit=False)
+        return copy.deepcopy(result)
+
+    def _lookup(self, key, fingerprint, scope):
+        if scope is not None:
+            entry = scope.get(key, fingerprint)
+            if entry is not None:
+                with self.lock:
+                    self.counters["scope_hits"] += 1
+                return entry[1]
+
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] != fingerprint:
+                del self.cache[key]
+                self.counters["stale"] += 1
+                return _MISSING
+            self.cache.move_to_end(key)
+            self.counters["global_hits"] += 1
+        if scope is not None:
+            scope.put(key, entry, hit=True)
+        return entry[1]
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self.cache)
+        calls = stats["scope_hits"] + stats["global_hits"] + stats["misses"]
+        stats["backend_calls_saved"] = calls - stats["misses"]
+        stats["hit_rate"] = stats["backend_calls_saved"] / calls if calls else 0.0
+        return stats
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+
+_registry: dict[str, _Memoized] = {}
+
+
+def memoize(
+    sources: Callable[[], list[str]] = lambda: [],
+    settings: Callable[[], tuple] = lambda: (),
+    maxsize: int = 256,
+):
+    """Cache a tool's results on its normalized arguments.
+
+    Args:
+        sources: Returns the files the tool reads from. Their fingerprint is
+            checked on every call, so a rebuilt store invalidates old results.
+        settings: Returns the config values the tool's results depend on;
+            they are part of the cache key.
+        maxsize: Entries kept in the process-wide LRU.
+
+    The wrapper keeps the tool's name, docstring and signature, so it can be
+    handed to `dspy.Tool` like the original. The original is available as
+    ``__wrapped__``, the cache as ``memo``.
+    """
+
+    def decorator(fn):
+        memo = _Memoized(fn, sources, settings, maxsize)
+        _registry[fn.__qualname__] = memo
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return memo(*args, **kwargs)
+
+        wrapper.memo = memo
+        return wrapper
+
+    return decorator
+
+
+def memo_stats() -> dict[str, dict]:
+    """Cache statistics for every memoized tool, keyed by function name."""
+    return {name: memo.stats() for name, memo in _registry.items()}
+
+
+def clear_memos():
+    for memo in _registry.values():
+        memo.clear()
@@ -0,0 +1,21 @@
+import asyncio
+
+import dspy
+
+
+class OffThreadTool(dspy.Tool):
+    """A `dspy.Tool` whose async path runs the sync function in a worker thread.
+
+    The retrievers block on Chroma, SQLite and Ollama. `dspy.Tool.acall` would
+    run them inline and stall the event loop, so `acall` hands them to
+    `asyncio.to_thread` instead. The sync `__call__` path is unchanged, which
+    lets the same tool list serve both `Agent.forward` and `Agent.aforward`.
+    """
+
+    async def acall(self, **kwargs):
+        return await asyncio.to_thread(self.__call__, **kwargs)
+
+
+def offthread_tools(funcs: list) -> list[OffThreadTool]:
+    """Wrap plain callables as `OffThreadTool`s."""
+    return [OffThreadTool(func) for func in funcs]
@@ -1,6 +1,11 @@
 import sqlite3
+import threading
 
 from crec.config import config
+from crec.ingestion.schedule import resolve_term
+from crec.tools.memo import file_fingerprint, memoize
+from crec.tools.sqlite_pool import get_connections
+from crec.tools.subject_resolver import SUBJECTS, SubjectResolver
 from typing import Optional
 import dspy
 from pydantic import BaseModel
@@ -14,6 +19,9 @@ logging.basicConfig(
 log = logging.getLogger(__file__)
 log.setLevel(logging.INFO)
 
+_terms_lock = threading.Lock()
+_cached_terms: tuple = (None, None, None)  # (path, fingerprint, loaded terms)
+
 
 class Schedule(BaseModel):
     id: int
@@ -28,60 +36,6 @@ class Schedule(BaseModel):
     credits: float
 
 
-SUBJECTS = [
-    "DKU",
-    "GERMAN",
-    "INDSTU",
-    "JAPANESE",
-    "KOREAN",
-    "MUSIC",
-    "SPANISH",
-    "ARHU",
-    "ARTS",
-    "BEHAVSCI",
-    "BIOL",
-    "CHEM",
-    "CHINESE",
-    "COMPDSGN",
-    "COMPSCI",
-    "CULANTH",
-    "CULMOVE",
-    "CULSOC",
-    "EAP",
-    "ECON",
-    "ENVIR",
-    "ETHLDR",
-    "GCHINA",
-    "GCULS",
-    "GLHLTH",
-    "HIST",
-    "HUM",
-    "INFOSCI",
-    "INSTGOV",
-    "LIT",
-    "MATH",
-    "MATSCI",
-    "MEDIA",
-    "MEDIART",
-    "NEUROSCI",
-    "PHIL",
-    "PHYS",
-    "PHYSEDU",
-    "POLECON",
-    "POLSCI",
-    "PPE",
-    "PSYCH",
-    "PUBPOL",
-    "SOCIOL",
-    "SOSC",
-    "STATS",
-    "USTUD",
-    "WOC",
-    "RELIG",
-    "MINITERM",
-]
-
-
 class subject_rewriter_signature(dspy.Signature):
     """
     Return the closest subject out of the possible subjects.
@@ -95,26 +49,55 @@ class subject_rewriter_signature(dspy.Signature):
     valid_subject: str = dspy.OutputField()
 
 
-def __retrieve_results(sql_query: str, inputs: tuple[str]) -> list[Schedule]:
-    with sqlite3.connect(
-        config.schedule_db,
-    ) as conn:
-        cursor = conn.cursor()
-        cursor.row_factory = sqlite3.Row
-
-        temp = conn.execute(sql_query, inputs).fetchall()
-    results = []
-
-    for t in temp:
-        # Source - https://stackoverflow.com/a
-        # Posted by ant1fact
-        # Retrieved 2025-12-06, License - CC BY-SA 4.0
-        s = Schedule(**{k: v for k, v in zip(Schedule.model_fields.keys(), t)})
-        results.append(s)
+def _llm_rewrite_subject(candidate: str) -> Optional[str]:
+    """Ask the LM for the closest subject when local matching is unsure."""
+    log.info("Predicting subject")
+    subject_rewriter = dspy.Predict(subject_rewriter_signature)
+    result = subject_rewriter(possible_subjects=SUBJECTS, candidate=candidate)
+    log.info(f"Predicted Subject: {result.valid_subject}")
+    if result.valid_subject == "None":
+        return None
+    return result.valid_subject
 
-    return results
+
+subject_resolver = SubjectResolver(llm_fallback=_llm_rewrite_subject)
+
+
+def _schedule_row_factory(cursor: sqlite3.Cursor, row: tuple) -> Schedule:
+    # Rows come from our own typed table, so skip pydantic validation.
+    return Schedule.model_construct(
+        **{column[0]: value for column, value in zip(cursor.description, row)}
+    )
 
 
+def _loaded_terms() -> list[str]:
+    """Return the terms in the schedule database, re-read when it changes."""
+    global _cached_terms
+
+    path = config.schedule_db
+    fingerprint = file_fingerprint([path])
+    cached_path, cached_fingerprint, terms = _cached_terms
+    if cached_path == path and cached_fingerprint == fingerprint:
+        return terms
+
+    with _terms_lock:
+        cached_path, cached_fingerprint, terms = _cached_terms
+        if cached_path != path or cached_fingerprint != fingerprint:
+            rows = get_connections(path).execute("SELECT DISTINCT term FROM schedule;")
+            terms = [term for (term,) in rows]
+            _cached_terms = (path, fingerprint, terms)
+    return terms
+
+
+def __retrieve_results(sql_query: str, inputs: tuple[str]) -> list[Schedule]:
+    connections = get_connections(config.schedule_db, _schedule_row_factory)
+    return connections.execute(sql_query, inputs)
+
+
+@memoize(
+    sources=lambda: [config.schedule_db],
+    settings=lambda: (config.schedule_term,),
+)
 def schedule_retriever(
     # TODO: For now let's focus on one session at a time
     # session: Optional[str] = None,
@@ -144,13 +127,17 @@ def schedule_retriever(
     inputs = None
 
     if not (subject_code is None or subject_code in SUBJECTS):
-        log.info("Predicting subject")
-        subject_rewriter = dspy.Predict(subject_rewriter_signature)
-        result = subject_rewriter(possible_subjects=SUBJECTS, candidate=subject_code)
-        log.info(f"Predicted Subject: {result}")
-        if result == "None":
+        resolved = subject_resolver.resolve(subject_code)
+        log.info(f"Resolved subject {subject_code} -> {resolved}")
+        if resolved is None:
             msg = f"{subject_code} does not exist in the schedule db."
             return LookupError(msg)
+        subject_code = resolved
+
+    term = resolve_term(config.schedule_term, _loaded_terms())
+    if term is None:
+        msg = f"No schedule is loaded for term {config.schedule_term!r}."
+        return LookupError(msg)
 
     if subject_code and catalog_num:
         if isinstance(catalog_num, int):
@@ -160,20 +147,22 @@ def schedule_retriever(
         sql_query = f"""
             SELECT id, session, subject, catalog_num, section,
             course_name, start_time, end_time, scheduled_days, credits
-            FROM spring_schedule
-            WHERE subject = ?
+            FROM schedule
+            WHERE term = ?
+            AND subject = ?
             AND catalog_num IN ({placeholders});
         """
-        inputs = (subject_code, *catalog_num)
+        inputs = (term, subject_code, *catalog_num)
 
     elif subject_code and (catalog_num is None):
         sql_query = """
             SELECT id, session, subject, catalog_num, section,
             course_name, start_time, end_time, scheduled_days, credits
-            FROM spring_schedule
-            WHERE subject = ?;
+            FROM schedule
+            WHERE term = ?
+            AND subject = ?;
         """
-        inputs = (subject_code,)
+        inputs = (term, subject_code)
     else:
         # Even though subject is required above
         # This is for safety i guess
@@ -0,0 +1,156 @@
+"""Bounded pools of read-only SQLite connections shared by the retrieval tools.
+
+Opening a connection per query costs a file open plus schema parsing, and
+Flask and ParallelReAct start short-lived threads, so per-thread connections
+pile up under load. ``ReadOnlyConnections`` keeps at most ``size`` connections
+to a database file, with ``query_only`` set and the statement cache enabled.
+Each query checks one out and returns it, and all are closed on shutdown.
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+# How long a waiting caller blocks on the idle queue before checking whether
+# a slot was freed without a connection coming back, as after close_all.
+_RECHECK_SECONDS = 0.1
+
+_registry_lock = threading.Lock()
+_registry: dict[tuple[str, Any], "ReadOnlyConnections"] = {}
+
+
+class ReadOnlyConnections:
+    """Lazily opened, bounded pool of read-only connections to one SQLite file.
+
+    Args:
+        db_path: Path to the SQLite database.
+        row_factory: Row factory installed on every connection.
+        size: Most connections open at once; further callers wait for one.
+        cached_statements: Size of each connection's prepared statement cache.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        row_factory: Optional[Callable[[sqlite3.Cursor, tuple], Any]] = None,
+        size: int = 4,
+        cached_statements: int = 128,
+    ):
+        self.db_path = db_path
+        self.row_factory = row_factory
+        self.size = size
+        self.cached_statements = cached_statements
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._generation = 0
+
+    def _open(self) -> sqlite3.Connection:
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        # Connections move between the threads that check them out.
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.execute("PRAGMA query_only = ON")
+        conn.row_factory = self.row_factory
+        return conn
+
+    def _checkout(self) -> tuple[sqlite3.Connection, int]:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        while True:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+                generation = self._generation
+            if can_open:
+                break
+            try:
+                return self._idle.get(timeout=_RECHECK_SECONDS)
+            except queue.Empty:
+                continue
+        try:
+            return self._open(), generation
+        except BaseException:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _checkin(self, conn: sqlite3.Connection, generation: int) -> None:
+        with self._lock:
+            current = generation == self._generation
+            if current:
+                # Under the lock so close_all cannot miss it.
+                self._idle.put((conn, generation))
+            else:
+                self._opened -= 1
+        if not current:
+            # Checked out across close_all; don't hand it out again.
+            conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check a connection out of the pool for the duration of the block."""
+        conn, generation = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._checkin(conn, generation)
+
+    def execute(self, sql: str, parameters: tuple = ()) -> list:
+        """Run a read query on a pooled connection and fetch all rows."""
+        with self.connection() as conn:
+            return conn.execute(sql, parameters).fetchall()
+
+    def close_all(self) -> None:
+        """Close every idle connection; checked-out ones close when returned,
+        and the pool reopens lazily on the next query."""
+        with self._lock:
+            self._generation += 1
+            connections = []
+            while True:
+                try:
+                    conn, _ = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                connections.append(conn)
+            self._opened -= len(connections)
+        for conn in connections:
+            conn.close()
+
+
+def get_connections(
+    db_path: str,
+    row_factory: Optional[Callable[[sqlite3.Cursor, tuple], Any]] = None,
+) -> ReadOnlyConnections:
+    """Return the process-wide connection pool for ``db_path``."""
+    key = (db_path, row_factory)
+    pool = _registry.get(key)
+    if pool is not None:
+        return pool
+
+    with _registry_lock:
+        pool = _registry.get(key)
+        if pool is None:
+            pool = ReadOnlyConnections(db_path, row_factory=row_factory)
+            _registry[key] = pool
+    return pool
+
+
+@atexit.register
+def close_all() -> None:
+    """Close every pooled connection in the process."""
+    with _registry_lock:
+        pools = list(_registry.values())
+    for pool in pools:
+        pool.close_all()
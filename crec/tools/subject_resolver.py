@@ -0,0 +1,199 @@
+"""Deterministic resolution of free-form subject names to schedule subject codes.
+
+The agent often passes "CS", "Bio" or "COMPSCII" where the schedule expects
+"COMPSCI" or "BIOL". ``SubjectResolver`` fixes those locally through an alias
+table, prefix matching and edit-distance scoring, memoizes its answers and
+only asks an LLM when none of that is confident.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from rapidfuzz import fuzz, process
+
+SUBJECTS = [
+    "DKU",
+    "GERMAN",
+    "INDSTU",
+    "JAPANESE",
+    "KOREAN",
+    "MUSIC",
+    "SPANISH",
+    "ARHU",
+    "ARTS",
+    "BEHAVSCI",
+    "BIOL",
+    "CHEM",
+    "CHINESE",
+    "COMPDSGN",
+    "COMPSCI",
+    "CULANTH",
+    "CULMOVE",
+    "CULSOC",
+    "EAP",
+    "ECON",
+    "ENVIR",
+    "ETHLDR",
+    "GCHINA",
+    "GCULS",
+    "GLHLTH",
+    "HIST",
+    "HUM",
+    "INFOSCI",
+    "INSTGOV",
+    "LIT",
+    "MATH",
+    "MATSCI",
+    "MEDIA",
+    "MEDIART",
+    "NEUROSCI",
+    "PHIL",
+    "PHYS",
+    "PHYSEDU",
+    "POLECON",
+    "POLSCI",
+    "PPE",
+    "PSYCH",
+    "PUBPOL",
+    "SOCIOL",
+    "SOSC",
+    "STATS",
+    "USTUD",
+    "WOC",
+    "RELIG",
+    "MINITERM",
+]
+
+# Common abbreviations and spelled-out names, keyed on the normalized form.
+SUBJECT_ALIASES = {
+    "CS": "COMPSCI",
+    "COMP SCI": "COMPSCI",
+    "COMPUTER SCIENCE": "COMPSCI",
+    "BIO": "BIOL",
+    "BIOLOGY": "BIOL",
+    "CHEMISTRY": "CHEM",
+    "PHYSICS": "PHYS",
+    "MATHEMATICS": "MATH",
+    "STAT": "STATS",
+    "STATISTICS": "STATS",
+    "ECONOMICS": "ECON",
+    "HISTORY": "HIST",
+    "HUMANITIES": "HUM",
+    "PSY": "PSYCH",
+    "PSYCHOLOGY": "PSYCH",
+    "NEURO": "NEUROSCI",
+    "NEUROSCIENCE": "NEUROSCI",
+    "PHILOSOPHY": "PHIL",
+    "LITERATURE": "LIT",
+    "RELIGION": "RELIG",
+    "SOC": "SOCIOL",
+    "SOCIOLOGY": "SOCIOL",
+    "ANTH": "CULANTH",
+    "ANTHROPOLOGY": "CULANTH",
+    "POLI SCI": "POLSCI",
+    "POLITICAL SCIENCE": "POLSCI",
+    "PUBLIC POLICY": "PUBPOL",
+    "ENV": "ENVIR",
+    "ENVIRONMENTAL SCIENCE": "ENVIR",
+    "GLOBAL HEALTH": "GLHLTH",
+    "GLOBAL CHINA STUDIES": "GCHINA",
+    "MATERIALS SCIENCE": "MATSCI",
+    "INFORMATION SCIENCE": "INFOSCI",
+    "MEDIA ARTS": "MEDIART",
+    "ART": "ARTS",
+    "PE": "PHYSEDU",
+    "PHYSICAL EDUCATION": "PHYSEDU",
+    "BEHAVIORAL SCIENCE": "BEHAVSCI",
+    "ETHICAL LEADERSHIP": "ETHLDR",
+    "INDEPENDENT STUDY": "INDSTU",
+}
+
+
+def normalize_subject(candidate: str) -> str:
+    """Upper-case ``candidate`` and collapse punctuation and whitespace."""
+    return " ".join(re.sub(r"[^A-Za-z]+", " ", candidate).split()).upper()
+
+
+class SubjectResolver:
+    """Resolve subject names to entries of ``subjects`` with an LRU memo.
+
+    Local answers are memoized, as are subjects the LLM found. An LLM miss is
+    not, so a transient failure is retried on the next call.
+
+    Args:
+        subjects: Valid subject codes.
+        aliases: Normalized alias -> subject code.
+        min_score: Minimum edit-distance similarity (0-100) for a fuzzy match
+            to be trusted without asking ``llm_fallback``.
+        min_margin: Minimum lead of the best fuzzy match over the runner-up.
+        llm_fallback: Called with the raw candidate when local matching is not
+            confident. Should return a subject code or None.
+        memo_size: Most answers memoized; the least recently used go first.
+    """
+
+    def __init__(
+        self,
+        subjects: list[str] = SUBJECTS,
+        aliases: dict[str, str] = SUBJECT_ALIASES,
+        min_score: float = 80,
+        min_margin: float = 5,
+        llm_fallback: Optional[Callable[[str], Optional[str]]] = None,
+        memo_size: int = 1024,
+    ):
+        self.subjects = list(subjects)
+        self.aliases = dict(aliases)
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.llm_fallback = llm_fallback
+        self.memo_size = memo_size
+        self._memo: OrderedDict[str, Optional[str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, candidate: str) -> Optional[str]:
+        """Return the subject code for ``candidate``, or None if there is none."""
+        key = normalize_subject(candidate)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        subject = self._resolve_locally(key)
+        if subject is None and self.llm_fallback is not None:
+            subject = self.llm_fallback(candidate)
+            if subject is not None:
+                subject = normalize_subject(subject)
+            if subject not in self.subjects:
+                return None
+
+        with self._lock:
+            self._memo[key] = subject
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return subject
+
+    def _resolve_locally(self, key: str) -> Optional[str]:
+        if not key:
+            return None
+        if key in self.subjects:
+            return key
+        if key in self.aliases:
+            return self.aliases[key]
+
+        compact = key.replace(" ", "")
+        if compact in self.subjects:
+            return compact
+
+        # A unique prefix, e.g. "NEUROS" -> "NEUROSCI".
+        prefixed = [s for s in self.subjects if s.startswith(compact)]
+        if len(compact) >= 3 and len(prefixed) == 1:
+            return prefixed[0]
+
+        matches = process.extract(compact, self.subjects, scorer=fuzz.ratio, limit=2)
+        best_subject, best_score, _ = matches[0]
+        runner_up = matches[1][1] if len(matches) > 1 else 0
+        if best_score >= self.min_score and best_score - runner_up >= self.min_margin:
+            return best_subject
+        return None
@@ -0,0 +1,248 @@
+"""Exact NumPy vector search over the course embeddings.
+
+A catalog of a few thousand courses fits in one contiguous float32 matrix,
+and a single matrix product against it is faster than an HNSW query and
+needs no collection to open. The courses pipeline exports the collection to
+``config.course_vectors`` (``.npy`` embeddings, memory-mapped on load, plus
+a ``.json`` sidecar with ids, documents, metadata and the shape and mtime of
+the matrix it was written with) when
+``config.course_vector_backend`` is ``"numpy"``. Results have the shape of
+Chroma's ``query``/``get`` results, so the retriever's node conversion is
+shared.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from crec.config import config
+from crec.embedding_cache import CachedOllamaEmbeddingFunction
+
+_lock = threading.Lock()
+_cached: tuple = (None, None, None)  # (prefix, mtime, NumpyVectorIndex)
+_embedder: tuple = (None, None)  # (model, CachedOllamaEmbeddingFunction)
+
+
+def _paths(prefix: str | Path) -> tuple[str, str]:
+    return f"{prefix}.npy", f"{prefix}.json"
+
+
+class NumpyVectorIndex:
+    """Brute-force top-k over an ``(n, dim)`` float32 matrix.
+
+    Args:
+        vectors: Course embeddings, one row per record.
+        ids: Record ids, as in the Chroma collection.
+        documents: Record texts.
+        metadatas: Record metadata.
+        space: Distance, as Chroma defines it: "l2" (squared), "cosine" or "ip".
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict],
+        space: str = "l2",
+    ):
+        self.vectors = vectors
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.space = space
+        norms = np.einsum("ij,ij->i", vectors, vectors)
+        # Per-row term of the distance: |v|^2 for l2, 1/|v| for cosine.
+        if space == "l2":
+            self._row_term = norms
+        elif space == "cosine":
+            self._row_term = 1.0 / np.maximum(np.sqrt(norms), 1e-12)
+        else:
+            self._row_term = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _column(self, field: str) -> list:
+        if field == "subject":
+            return [(m.get("course_code") or "").split(" ")[0] for m in self.metadatas]
+        return [m.get(field) for m in self.metadatas]
+
+    def mask(self, where: dict[str, str | list[str]]) -> np.ndarray:
+        """Rows whose metadata matches every ``where`` item.
+
+        A value matches by equality, a list by membership, like Chroma's
+        ``$in``. ``subject`` is the subject part of ``course_code``.
+        """
+        selected = np.ones(len(self.ids), dtype=bool)
+        for field, value in where.items():
+            wanted = set(value) if isinstance(value, (list, tuple, set)) else {value}
+            selected &= np.fromiter(
+                (v in wanted for v in self._column(field)),
+                dtype=bool,
+                count=len(self.ids),
+            )
+        return selected
+
+    def distances(self, queries: np.ndarray) -> np.ndarray:
+        """``(len(queries), n)`` distances from every query to every row."""
+        scores = queries @ self.vectors.T
+        if self.space == "l2":
+            q_norms = np.einsum("ij,ij->i", queries, queries)
+            return q_norms[:, None] - 2 * scores + self._row_term[None, :]
+        if self.space == "cosine":
+            q_inv = 1.0 / np.maximum(np.linalg.norm(queries, axis=1), 1e-12)
+            return 1 - scores * q_inv[:, None] * self._row_term[None, :]
+        return 1 - scores
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int,
+        where: Optional[dict[str, str | list[str]]] = None,
+    ) -> dict:
+        """Top `n_results` rows for every query at once, shaped like Chroma's
+        ``collection.query`` result."""
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        k = min(n_results, len(self))
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if k == 0:
+            for values in result.values():
+                values.extend([] for _ in range(len(queries)))
+            return result
+
+        distances = self.distances(queries)
+        if where:
+            distances[:, ~self.mask(where)] = np.inf
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_distances = np.take_along_axis(top_distances, order, axis=1)
+
+        for rows, row_distances in zip(top, top_distances):
+            keep = np.isfinite(row_distances)
+            rows, row_distances = rows[keep], row_distances[keep]
+            result["ids"].append([self.ids[i] for i in rows])
+            result["documents"].append([self.documents[i] for i in rows])
+            result["metadatas"].append([self.metadatas[i] for i in rows])
+            result["distances"].append(row_distances.tolist())
+        return result
+
+    def get(self, where: dict[str, str | list[str]]) -> dict:
+        """Rows matching ``where``, shaped like Chroma's ``collection.get`` result."""
+        rows = np.flatnonzero(self.mask(where))
+        return {
+            "ids": [self.ids[i] for i in rows],
+            "documents": [self.documents[i] for i in rows],
+            "metadatas": [self.metadatas[i] for i in rows],
+        }
+
+    def save(self, prefix: str | Path) -> None:
+        """Write the matrix, then the sidecar, each atomically.
+
+        The sidecar records the matrix's shape and mtime, so ``load`` can tell
+        a sidecar from a different write than the matrix next to it.
+        """
+        npy_path, json_path = _paths(prefix)
+        with open(f"{npy_path}.tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        os.replace(f"{npy_path}.tmp", npy_path)
+        with open(f"{json_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "shape": list(self.vectors.shape),
+                    "vectors_mtime_ns": os.stat(npy_path).st_mtime_ns,
+                    "space": self.space,
+                    "ids": self.ids,
+                    "documents": self.documents,
+                    "metadatas": self.metadatas,
+                },
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        os.replace(f"{json_path}.tmp", json_path)
+
+    @classmethod
+    def load(cls, prefix: str | Path) -> "NumpyVectorIndex":
+        """Memory-map an export.
+
+        Raises:
+            ValueError: The matrix is not the one the sidecar was written
+                with, e.g. an export is in progress.
+        """
+        npy_path, json_path = _paths(prefix)
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        mtime_ns = os.stat(npy_path).st_mtime_ns
+        vectors = np.load(npy_path, mmap_mode="r")
+        written = (data.get("vectors_mtime_ns"), data.get("shape"))
+        if written != (mtime_ns, list(vectors.shape)):
+            msg = f"{npy_path} does not match {json_path}"
+            raise ValueError(msg)
+        return cls(
+            vectors, data["ids"], data["documents"], data["metadatas"], data["space"]
+        )
+
+    @classmethod
+    def from_collection(cls, collection) -> "NumpyVectorIndex":
+        """Copy every record of a Chroma collection, embeddings included, and
+        search with the same distance as its HNSW index."""
+        hnsw = (collection.configuration or {}).get("hnsw") or {}
+        space = hnsw.get("space", "l2")
+        result = collection.get(include=["embeddings", "documents", "metadatas"])
+        if not result["ids"]:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        else:
+            vectors = np.asarray(result["embeddings"], dtype=np.float32)
+        return cls(
+            vectors, result["ids"], result["documents"], result["metadatas"], space
+        )
+
+
+def get_vector_index() -> Optional[NumpyVectorIndex]:
+    """Return the process-wide index, reloaded when the export changes.
+
+    Returns:
+        The index, or None if ``config.course_vectors`` has not been exported.
+        While an export is being rewritten, the previous index is kept.
+    """
+    global _cached
+
+    prefix = config.course_vectors
+    try:
+        # The sidecar is written last, so its mtime marks a complete export.
+        mtime = os.stat(_paths(prefix)[1]).st_mtime
+    except FileNotFoundError:
+        return None
+
+    cached_prefix, cached_mtime, index = _cached
+    if cached_prefix == prefix and cached_mtime == mtime:
+        return index
+
+    with _lock:
+        cached_prefix, cached_mtime, index = _cached
+        if cached_prefix != prefix or cached_mtime != mtime:
+            try:
+                index = NumpyVectorIndex.load(prefix)
+            except (ValueError, FileNotFoundError):
+                # Half-written export; retry on the next call.
+                return index if cached_prefix == prefix else None
+            _cached = (prefix, mtime, index)
+    return index
+
+
+def embed_queries(texts: list[str]) -> list:
+    """Embed query texts with the model the collection was built with."""
+    global _embedder
+
+    model, embedder = _embedder
+    if model != config.embedding:
+        embedder = CachedOllamaEmbeddingFunction(model_name=config.embedding)
+        _embedder = (config.embedding, embedder)
+    return embedder(texts)
@@ -0,0 +1,149 @@
+"""Sweep HNSW settings for the courses collection against exact search.
+
+Usage:
+    python -m crec.tune_hnsw [--k 3] [--queries 200] [--ef-construction 100 200]
+        [--m 16 32] [--ef-search 10 25 50 100] [--query-file queries.txt]
+
+The embeddings of the ingested courses collection are loaded once and
+indexed into a throwaway in-memory collection per setting. A loaded index
+keeps the ef_search it was opened with, so every ef_search gets its own
+build. Each setting is reported as latency and recall@k against the exact
+``NumpyVectorIndex`` search. Pick an operating point and set the
+``courses_hnsw_*`` keys in ``crec.config``.
+
+Queries are the lines of ``--query-file``, embedded with the configured
+model, or midpoints of random pairs of course embeddings otherwise, so no
+embedding service is needed.
+"""
+
+import argparse
+import itertools
+import time
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+
+from crec.config import config
+from crec.embedding_cache import CachedOllamaEmbeddingFunction
+from crec.tools import chroma_handles
+from crec.tools.vector_index import NumpyVectorIndex
+
+
+def exact_top_k(
+    vectors: np.ndarray, queries: np.ndarray, k: int, space: str
+) -> list[list[str]]:
+    """Ids of each query's `k` nearest vectors, from the exact NumPy index
+    with Chroma's distance for `space`. Row `i` has id ``str(i)``."""
+    ids = [str(i) for i in range(len(vectors))]
+    index = NumpyVectorIndex(vectors, ids, [""] * len(ids), [{}] * len(ids), space)
+    return index.query(queries, k)["ids"]
+
+
+def load_embeddings() -> np.ndarray:
+    client = chroma_handles.get_client(config.chroma_path)
+    collection = client.get_collection(config.courses_col)
+    result = collection.get(include=["embeddings"])
+    return np.asarray(result["embeddings"], dtype=np.float32)
+
+
+def make_queries(vectors: np.ndarray, n: int, query_file: str = None) -> np.ndarray:
+    if query_file:
+        with open(query_file, "r", encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+        embed = CachedOllamaEmbeddingFunction(model_name=config.embedding)
+        return np.asarray(embed(texts), dtype=np.float32)
+    rng = np.random.default_rng(0)
+    pairs = rng.integers(0, len(vectors), size=(n, 2))
+    return (vectors[pairs[:, 0]] + vectors[pairs[:, 1]]) / 2
+
+
+def build(
+    client,
+    vectors: np.ndarray,
+    space: str,
+    ef_construction: int,
+    m: int,
+    ef_search: int,
+):
+    collection = client.create_collection(
+        name=f"tune-{space}-{ef_construction}-{m}-{ef_search}",
+        embedding_function=None,
+        configuration={
+            "hnsw": {
+                "space": space,
+                "ef_construction": ef_construction,
+                "max_neighbors": m,
+                "ef_search": ef_search,
+            }
+        },
+    )
+    ids = [str(i) for i in range(len(vectors))]
+    batch_size = client.get_max_batch_size()
+    for start in range(0, len(vectors), batch_size):
+        collection.add(
+            ids=ids[start : start + batch_size],
+            embeddings=vectors[start : start + batch_size],
+        )
+    return collection
+
+
+def sweep(client, vectors, queries, args):
+    print(
+        f"{len(vectors)} courses, {len(queries)} queries, recall@{args.k} "
+        "against brute force"
+    )
+    print(
+        f"{'space':<7} {'ef_c':>5} {'M':>4} {'ef_s':>5} "
+        f"{'recall':>7} {'mean ms':>8} {'p95 ms':>8} {'build s':>8}"
+    )
+    for space in args.space:
+        exact = exact_top_k(vectors, queries, args.k, space)
+        settings = itertools.product(args.ef_construction, args.m, args.ef_search)
+        for ef_construction, m, ef_search in settings:
+            start = time.perf_counter()
+            collection = build(client, vectors, space, ef_construction, m, ef_search)
+            build_s = time.perf_counter() - start
+            timings, hits = [], 0
+            for query, truth in zip(queries, exact):
+                start = time.perf_counter()
+                result = collection.query(
+                    query_embeddings=[query], n_results=args.k, include=[]
+                )
+                timings.append(time.perf_counter() - start)
+                hits += len(set(result["ids"][0]).intersection(truth))
+            ms = np.array(timings) * 1000
+            print(
+                f"{space:<7} {ef_construction:>5} {m:>4} {ef_search:>5} "
+                f"{hits / (len(queries) * args.k):>7.3f} {ms.mean():>8.3f} "
+                f"{np.percentile(ms, 95):>8.3f} {build_s:>8.2f}"
+            )
+            client.delete_collection(collection.name)
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=config.course_text_k)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-file")
+    parser.add_argument("--space", nargs="+", default=[config.courses_hnsw_space])
+    parser.add_argument(
+        "--ef-construction",
+        type=int,
+        nargs="+",
+        default=[config.courses_hnsw_ef_construction],
+    )
+    parser.add_argument("--m", type=int, nargs="+", default=[config.courses_hnsw_m])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 25, 50, 100])
+    args = parser.parse_args(argv)
+
+    vectors = load_embeddings()
+    if len(vectors) <= args.k:
+        raise SystemExit("Ingest the courses collection before tuning it.")
+    queries = make_queries(vectors, args.queries, args.query_file)
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    sweep(client, vectors, queries, args)
+
+
+if __name__ == "__main__":
+    main()